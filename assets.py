@@ -0,0 +1,122 @@
+"""Static assets of the app, prepared once per server process instead of on every rerun"""
+import os
+
+import streamlit as st
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGO_PATH = os.path.join(ASSET_DIR, "Logo.png")
+
+# Page styles injected at the top of every rerun
+APP_CSS = """
+<style>
+    .main {
+        background-color: #f5f5f5;
+    }
+    .block-container {
+        padding-top: 2rem;
+        padding-bottom: 0rem;
+        max-width: 100%;
+    }
+    header {
+        visibility: visible !important;
+    }
+    .main > div {
+        padding-top: 2rem;
+    }
+    .stMetric {
+        background-color: white;
+        padding: 10px;
+        border-radius: 8px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .risk-table {
+        background-color: white;
+        padding: 15px;
+        border-radius: 8px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+    .summary-box {
+        background-color: #e8e8e8;
+        padding: 15px;
+        border-radius: 8px;
+        margin-bottom: 15px;
+    }
+    .survey-card {
+        background-color: white;
+        padding: 8px;
+        border-radius: 6px;
+        text-align: center;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        margin-bottom: 8px;
+    }
+    .grc-card {
+        background-color: white;
+        padding: 8px;
+        border-radius: 6px;
+        text-align: center;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        margin-bottom: 8px;
+    }
+    .grc-number {
+        font-size: 32px;
+        color: #ff6347;
+        font-weight: bold;
+        margin: 5px 0;
+    }
+    .survey-number {
+        font-size: 24px;
+        font-weight: bold;
+        color: #333;
+        margin: 5px 0;
+    }
+    .survey-label {
+        color: #999;
+        font-size: 12px;
+    }
+    h1 {
+        font-size: 28px !important;
+        margin-bottom: 0.5rem !important;
+        padding: 0 !important;
+    }
+    h3 {
+        font-size: 18px !important;
+        margin: 0.5rem 0 !important;
+    }
+    h4 {
+        font-size: 14px !important;
+        margin: 0.3rem 0 !important;
+    }
+    .stButton button {
+        width: 100%;
+        height: 35px;
+        padding: 5px;
+        font-size: 13px;
+    }
+    div[data-testid="stSelectbox"] {
+        margin-bottom: 0.5rem;
+    }
+    .element-container {
+        margin-bottom: 0.3rem;
+    }
+    [data-testid="stTextArea"] textarea {
+        height: 100px !important;
+        min-height: 100px !important;
+    }
+    .nav-button {
+        background-color: #20B2AA;
+        color: white;
+        border: none;
+        padding: 10px 20px;
+        font-size: 16px;
+        border-radius: 5px;
+        cursor: pointer;
+    }
+</style>
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def logo_bytes():
+    """Return the contents of the sidebar logo, read from disk once"""
+    with open(LOGO_PATH, "rb") as f:
+        return f.read()
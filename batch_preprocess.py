@@ -0,0 +1,163 @@
+"""Process many risk workbooks without the Streamlit UI.
+
+Example:
+    python batch_preprocess.py archive/2023 "archive/2024/*.xlsx" --workers 8
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from data_cache import file_fingerprint
+from preprocess_data import process_excel_data
+from snapshot_catalog import SNAPSHOT_DIR, find_snapshot
+from snapshot_store import save_snapshot
+
+# Backfills go next to the app's snapshots without becoming the dataset the app loads
+DEFAULT_STORE = os.path.join(SNAPSHOT_DIR, "batch")
+EXCEL_EXTENSIONS = (".xlsx", ".xls")
+
+
+def find_workbooks(patterns):
+    """Expand directories and glob patterns into a sorted list of workbook paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            candidates = glob.glob(pattern) or [pattern]
+        for path in candidates:
+            name = os.path.basename(path)
+            # Skip Excel's "~$" lock files next to open workbooks
+            if name.lower().endswith(EXCEL_EXTENSIONS) and not name.startswith("~$"):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def fingerprint_workbook(path):
+    """Return the content hash of a workbook file, or None when it cannot be read"""
+    try:
+        with open(path, "rb") as f:
+            return file_fingerprint(f.read())
+    except OSError:
+        return None
+
+
+def process_workbook(path, store, force=False, file_hash=None):
+    """Process one workbook into the snapshot store and return a report record
+
+    A file_hash already computed by fingerprint_workbook saves reading the file twice.
+    """
+    started = time.perf_counter()
+    record = {"path": path, "success": False, "snapshot_id": None, "message": "", "seconds": 0.0}
+    try:
+        if file_hash is None:
+            with open(path, "rb") as f:
+                file_hash = file_fingerprint(f.read())
+        record["source_hash"] = file_hash
+
+        snapshot_id = None if force else find_snapshot(file_hash, store)
+        if snapshot_id is not None:
+            record.update(success=True, snapshot_id=snapshot_id, message="Already processed", skipped=True)
+        else:
+            result = process_excel_data(path)
+            record["message"] = result[6]
+            if result[5]:
+                record["snapshot_id"] = save_snapshot(result, file_hash, snapshot_dir=store, keep=None)
+                record["success"] = True
+                record["latest_col_ytd_idx"] = result[4]
+                record["shape_ytd"] = list(result[0].shape) if result[0] is not None else None
+                record["shape_summary"] = list(result[1].shape) if result[1] is not None else None
+    except Exception as e:
+        record["message"] = f"Error processing file: {str(e)}"
+
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def _duplicate_record(record, path):
+    """Return the report record of a copy of an already processed workbook"""
+    duplicate = dict(record, path=path, seconds=0.0, skipped=record["success"])
+    duplicate["message"] = f"Duplicate of {os.path.relpath(record['path'])}: {record['message']}"
+    return duplicate
+
+
+def run_batch(paths, store, workers=None, force=False):
+    """Process workbooks on a process pool and yield report records as they finish
+
+    Workers hash every file first; copies of the same workbook are processed once
+    and reported as duplicates of it.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(fingerprint_workbook, path): (path, True) for path in paths}
+        processed = {}   # file_hash -> path submitted for it
+        finished = {}    # file_hash -> record of that path
+        duplicates = {}  # file_hash -> copies waiting for its record
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, hashing = pending.pop(future)
+                if hashing:
+                    file_hash = future.result()
+                    if file_hash in finished:
+                        yield _duplicate_record(finished[file_hash], path)
+                    elif file_hash in processed:
+                        duplicates.setdefault(file_hash, []).append(path)
+                    else:
+                        # Unreadable files (no hash) are processed alone, which reports the error
+                        if file_hash is not None:
+                            processed[file_hash] = path
+                        pending[executor.submit(process_workbook, path, store, force, file_hash)] = (path, False)
+                    continue
+
+                record = future.result()
+                yield record
+                file_hash = record.get("source_hash")
+                if file_hash is not None and processed.get(file_hash) == path:
+                    finished[file_hash] = record
+                    for duplicate in duplicates.pop(file_hash, []):
+                        yield _duplicate_record(record, duplicate)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Preprocess Data_YTD/Summary workbooks into the snapshot store.")
+    parser.add_argument("inputs", nargs="+", help="workbook files, directories or glob patterns")
+    parser.add_argument("--store", default=DEFAULT_STORE, help=f"snapshot directory (default: {DEFAULT_STORE})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="reprocess workbooks that already have a snapshot")
+    parser.add_argument("--report", help="write the per-file report to this JSON file")
+    args = parser.parse_args(argv)
+
+    paths = find_workbooks(args.inputs)
+    if not paths:
+        print("No workbooks found", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.store, exist_ok=True)
+    print(f"Processing {len(paths)} workbook(s) with {args.workers} worker(s) into {args.store}")
+
+    started = time.perf_counter()
+    records = []
+    for record in run_batch(paths, args.store, args.workers, args.force):
+        records.append(record)
+        status = "skip" if record.get("skipped") else ("ok" if record["success"] else "FAIL")
+        detail = record["snapshot_id"] if record["success"] else record["message"]
+        print(f"[{status:>4}] {record['seconds']:8.2f}s  {os.path.relpath(record['path'])}  {detail}")
+
+    failures = [record for record in records if not record["success"]]
+    elapsed = time.perf_counter() - started
+    print(f"Done in {elapsed:.2f}s: {len(records) - len(failures)} succeeded, {len(failures)} failed")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"store": args.store, "seconds": round(elapsed, 3), "files": records}, f, indent=2)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
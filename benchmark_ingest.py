@@ -0,0 +1,194 @@
+"""Benchmark process_excel_data on synthetic workbooks of increasing size.
+
+Each case runs in a fresh process and records, per processing stage, wall time,
+allocations (tracemalloc) and the process peak RSS. Results are written as JSON
+so runs of different versions can be compared with --baseline.
+
+Example:
+    python benchmark_ingest.py --sizes 12x150 120x1000 600x5000 --repeat 3
+    python benchmark_ingest.py --baseline benchmark_results/ingest-old.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from preprocess_data import PROGRESS_STAGES, process_excel_data
+from synthetic_workbook import write_workbook
+
+DEFAULT_SIZES = ["12x150", "60x500", "120x1000"]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results")
+WORKBOOK_DIR = os.path.join(RESULTS_DIR, "workbooks")
+
+
+def parse_size(size):
+    """Parse a '<months>x<parameters>' size"""
+    months, parameters = size.lower().split("x")
+    return int(months), int(parameters)
+
+
+def _peak_rss_mb():
+    """Return the peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_stages(path, trace):
+    """Process a workbook once and return one record per reported stage plus the total"""
+    stages = []
+    started = last = time.perf_counter()
+
+    def progress(stage):
+        nonlocal last
+        now = time.perf_counter()
+        record = {"stage": stage, "seconds": round(now - last, 4), "peak_rss_mb": _peak_rss_mb()}
+        if trace:
+            current, peak = tracemalloc.get_traced_memory()
+            record["alloc_peak_mb"] = round(peak / 2**20, 2)
+            record["alloc_retained_mb"] = round(current / 2**20, 2)
+            tracemalloc.reset_peak()
+        stages.append(record)
+        last = time.perf_counter()
+
+    if trace:
+        tracemalloc.start()
+    try:
+        result = process_excel_data(path, progress=progress)
+    finally:
+        if trace:
+            tracemalloc.stop()
+    if not result[5]:
+        raise RuntimeError(result[6])
+
+    total = {"seconds": round(time.perf_counter() - started, 4), "peak_rss_mb": _peak_rss_mb()}
+    return stages, total
+
+
+def run_case(path, repeat):
+    """Benchmark one workbook: `repeat` timed runs, then one run under tracemalloc"""
+    # Peak RSS before the first run: interpreter plus imported libraries
+    baseline_rss_mb = _peak_rss_mb()
+    # tracemalloc slows allocation-heavy code down, so timings come from untraced runs
+    runs = [_run_stages(path, trace=False) for _ in range(repeat)]
+    traced_stages, _ = _run_stages(path, trace=True)
+
+    stages = []
+    for i, stage in enumerate(PROGRESS_STAGES):
+        seconds = [run[0][i]["seconds"] for run in runs if i < len(run[0])]
+        record = {
+            "stage": stage,
+            "seconds_min": min(seconds),
+            "seconds_median": round(statistics.median(seconds), 4),
+            "peak_rss_mb": runs[0][0][i]["peak_rss_mb"],
+        }
+        if i < len(traced_stages):
+            record["alloc_peak_mb"] = traced_stages[i]["alloc_peak_mb"]
+            record["alloc_retained_mb"] = traced_stages[i]["alloc_retained_mb"]
+        stages.append(record)
+
+    totals = [run[1]["seconds"] for run in runs]
+    return {
+        "stages": stages,
+        "seconds_min": min(totals),
+        "seconds_median": round(statistics.median(totals), 4),
+        "seconds_all": totals,
+        "peak_rss_mb": runs[0][1]["peak_rss_mb"],
+        "baseline_rss_mb": baseline_rss_mb,
+    }
+
+
+def workbook_for(months, parameters, workbook_dir):
+    """Return the path of the synthetic workbook of a size, generating it on first use"""
+    os.makedirs(workbook_dir, exist_ok=True)
+    path = os.path.join(workbook_dir, f"synthetic-{months}x{parameters}.xlsx")
+    if not os.path.exists(path):
+        write_workbook(path, months=months, parameters=parameters)
+    return path
+
+
+def _environment():
+    """Describe the interpreter, libraries and source revision being benchmarked"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "openpyxl": openpyxl.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline):
+    """Print the total time of each case against the same case in a baseline run"""
+    previous = {case["size"]: case for case in baseline.get("cases", [])}
+    for case in results["cases"]:
+        old = previous.get(case["size"])
+        if old is None:
+            continue
+        ratio = case["seconds_median"] / old["seconds_median"] if old["seconds_median"] else float("inf")
+        print(f"{case['size']:>12}  {old['seconds_median']:8.3f}s -> {case['seconds_median']:8.3f}s  ({ratio:.2f}x)"
+              f"  peak RSS {old['peak_rss_mb']:.0f} -> {case['peak_rss_mb']:.0f} MiB")
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark workbook ingest on synthetic Data_YTD/Summary workbooks.")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES,
+                        help=f"<months>x<parameters> cases (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (default: 3)")
+    parser.add_argument("--workbooks", default=WORKBOOK_DIR, help=f"generated workbook cache (default: {WORKBOOK_DIR})")
+    parser.add_argument("--output", help="results JSON path (default: benchmark_results/ingest-<time>.json)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"ingest-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    results = {"created_at": time.time(), "environment": _environment(), "repeat": args.repeat, "cases": []}
+
+    # A fresh spawned process per case keeps peak RSS from leaking between sizes
+    context = multiprocessing.get_context("spawn")
+    for size in args.sizes:
+        months, parameters = parse_size(size)
+        path = workbook_for(months, parameters, args.workbooks)
+        with context.Pool(1) as pool:
+            case = pool.apply(run_case, (path, args.repeat))
+        case.update(size=size, months=months, parameters=parameters, workbook_mb=round(os.path.getsize(path) / 2**20, 2))
+        results["cases"].append(case)
+
+        print(f"{size:>12}  median {case['seconds_median']:8.3f}s  peak RSS {case['peak_rss_mb']:8.1f} MiB")
+        for stage in case["stages"]:
+            print(f"{'':>14}{stage['stage']:<32} {stage['seconds_median']:8.3f}s"
+                  f"  alloc peak {stage.get('alloc_peak_mb', float('nan')):8.1f} MiB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import streamlit as st
+import plotly.graph_objects as go
+from profiling import span
+
+# Figures kept per server process; each is a few KB, keyed by dataset, date, metric and variant
+FIGURE_CACHE_ENTRIES = 256
+
+# Size of the line figures in the "All Graphs" grid and in their own tab
+LINE_VARIANTS = {
+    "grid": {"height": 250, "line_width": 2, "marker_size": 6},
+    "single": {"height": 450, "line_width": 3, "marker_size": 8},
+}
+
+
+def line_figure(title, dates, values, variant="grid"):
+    """Build the line chart of one metric over the given dates"""
+    style = LINE_VARIANTS[variant]
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=list(dates), y=list(values), mode='lines+markers', name=title,
+        line=dict(width=style["line_width"]), marker=dict(size=style["marker_size"])
+    ))
+    fig.update_layout(
+        title=title, height=style["height"],
+        margin=dict(l=40, r=20, t=40, b=30),
+        xaxis=dict(showgrid=True), yaxis=dict(showgrid=True),
+        plot_bgcolor='white'
+    )
+    return fig
+
+
+def portfolio_pie_figure(labels, values):
+    """Build the pie chart of the investment portfolio distribution"""
+    fig = go.Figure(data=[go.Pie(
+        labels=list(labels),
+        values=list(values),
+        hole=0.3,
+        textinfo='label+percent',
+        textposition='auto'
+    )])
+    fig.update_layout(
+        title="Distribusi Portfolio Investasi",
+        height=400,
+        margin=dict(l=10, r=10, t=40, b=80),
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+    )
+    return fig
+
+
+def single_pie_figure(title, value):
+    """Build the full pie showing the value of one investment type"""
+    fig = go.Figure(data=[go.Pie(
+        labels=[title],
+        values=[100],  # Full 100% pie
+        hole=0.3,
+        textinfo='label+value',
+        textposition='inside',
+        text=[f"{value}"]
+    )])
+    fig.update_layout(
+        title=f"{title}: {value}",
+        height=450,
+        margin=dict(l=20, r=20, t=40, b=20),
+        showlegend=False
+    )
+    return fig
+
+
+def gauge_figure(score):
+    """Build the composite score gauge coloured by the risk bands"""
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=score,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        number={'font': {'size': 32}},
+        gauge={
+            'axis': {'range': [None, 5], 'tickwidth': 2},
+            'bar': {'color': "black", 'thickness': 0.3},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'steps': [
+                {'range': [0, 1.80], 'color': '#90d050'},
+                {'range': [1.80, 2.60], 'color': '#fff2cc'},
+                {'range': [2.60, 3.40], 'color': '#ffff00'},
+                {'range': [3.40, 4.20], 'color': '#ffc001'},
+                {'range': [4.20, 5], 'color': '#ff0000'}
+            ],
+        }
+    ))
+    fig.update_layout(height=280, margin=dict(l=20, r=20, t=0, b=20))
+    return fig
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def _cached_figure(dataset_id, date, metric, variant, _build):
+    """Build a figure once per dataset, date, metric and variant"""
+    with span("charts.figure_build", metric=metric):
+        return _build()
+
+
+def get_figure(dataset_id, date, metric, variant, build):
+    """Return the figure for a chart, reusing the one built on an earlier rerun
+
+    `build` is only called on a cache miss. Figures of data without a dataset id
+    are built every time since their values cannot be told apart.
+    """
+    if dataset_id is None:
+        with span("charts.figure_build", metric=metric):
+            return build()
+    return _cached_figure(dataset_id, str(date), metric, variant, _build=build)
@@ -0,0 +1,58 @@
+import numpy as np
+
+# Month lags and rolling windows computed for every parameter of a dataset
+MOM_LAG = 1
+YOY_LAG = 12
+ROLLING_WINDOWS = (3, 12)
+
+# Double precision keeps the changes of large counts and amounts exact to the unit
+COMPARISON_DTYPE = np.float64
+
+
+def period_change(matrix, lag):
+    """Return the change and relative change of every cell against the cell `lag` months earlier
+
+    Both results have the shape of `matrix`; the first `lag` months and cells
+    without a value on either side are NaN, and so is the relative change
+    against a zero value.
+    """
+    delta = np.full(matrix.shape, np.nan, dtype=COMPARISON_DTYPE)
+    pct = np.full(matrix.shape, np.nan, dtype=COMPARISON_DTYPE)
+    if matrix.shape[1] > lag:
+        current = matrix[:, lag:]
+        previous = matrix[:, :-lag]
+        delta[:, lag:] = current - previous
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct[:, lag:] = np.where(previous != 0, (current - previous) / np.abs(previous), np.nan)
+    return delta, pct
+
+
+def rolling_mean(matrix, window):
+    """Return the mean of the values in the trailing `window` months of every cell
+
+    Missing months are skipped; cells whose window holds no value are NaN.
+    """
+    present = ~np.isnan(matrix)
+    # Cumulative sums with a leading zero column turn every window into one subtraction
+    sums = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    counts = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+    np.cumsum(np.where(present, matrix, 0.0), axis=1, out=sums[:, 1:])
+    np.cumsum(present, axis=1, out=counts[:, 1:])
+
+    ends = np.arange(1, matrix.shape[1] + 1)
+    starts = np.maximum(ends - window, 0)
+    window_sums = sums[:, ends] - sums[:, starts]
+    window_counts = counts[:, ends] - counts[:, starts]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan).astype(COMPARISON_DTYPE)
+
+
+def compare_periods(matrix):
+    """Compute month-over-month, year-over-year and rolling-mean comparisons of a (rows x months) matrix"""
+    matrix = np.asarray(matrix, dtype=float)
+    mom, mom_pct = period_change(matrix, MOM_LAG)
+    yoy, yoy_pct = period_change(matrix, YOY_LAG)
+    comparisons = {'mom': mom, 'mom_pct': mom_pct, 'yoy': yoy, 'yoy_pct': yoy_pct}
+    for window in ROLLING_WINDOWS:
+        comparisons[f'rolling_{window}'] = rolling_mean(matrix, window)
+    return comparisons
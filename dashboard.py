@@ -1,14 +1,299 @@
+import inspect
+from html import escape
 import streamlit as st
-import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-from utils import format_value, format_percentage, null_value
+from utils import format_value, format_percentage, null_value, format_number, format_average
+from metrics import YTD_METRICS, KPI_CARDS, LINE_CHARTS, PIE_CHARTS, COMPLIANCE_COLUMNS, unresolved_metrics
+from preprocess_data import risk_band_codes
+from charts import get_figure, gauge_figure, line_figure, portfolio_pie_figure, single_pie_figure
+from kpi_grid import render_kpi_grid
+from dataset_registry import dataset_index, session_dataset
+from profiling import span, timed
+
+def load_data_index(dataset):
+    """Return the row lookups of a registered dataset, built once and shared across reruns and sessions"""
+    with span("dashboard.data_index"):
+        return dataset_index(dataset)
+
+def metric_row(data_index, key):
+    """Return the Data_YTD row offset of a metric, raising KeyError when the workbook lacks it"""
+    row = data_index['metric_rows'].get(key)
+    if row is None:
+        raise KeyError(f"{YTD_METRICS[key]['parameter']} not found")
+    return row
+
+# Streamlit versions whose st.tabs can report the selected tab and only run that one
+LAZY_TABS_SUPPORTED = "on_change" in inspect.signature(st.tabs).parameters
+
+def lazy_tabs(labels, key):
+    """Create tabs and return them with a flag per tab telling whether its content is needed
+
+    With lazy tabs only the selected tab is rendered; opening another tab reruns the
+    enclosing fragment. Older Streamlit versions render every tab, so every flag is True there.
+    """
+    if LAZY_TABS_SUPPORTED:
+        tabs = st.tabs(labels, key=key, on_change="rerun")
+        return tabs, [bool(tab.open) for tab in tabs]
+    tabs = st.tabs(labels)
+    return tabs, [True] * len(tabs)
+
+# Cell style of each risk band code; code -1 (no band) picks the last, empty style
+RISK_BAND_STYLES = np.array([
+    'background-color: #90d050',
+    'background-color: #fff2cc',
+    'background-color: #ffff00',
+    'background-color: #ffc001',
+    'background-color: #ff0000',
+    '',
+], dtype=object)
+SCORE_COLUMNS = ['previous_month', 'present_month']
+SUMMARY_TABLE_ROWS = 9
+# Extra columns of the summary table when a single risk category is selected
+CATEGORY_DETAIL_COLUMNS = ['weighted', 'score classification']
+
+# Risk type selector entry showing every category
+OVERALL_RISK = "Keseluruhan Risiko"
+
+def build_summary_table(df_summary_display, bands):
+    """Return the summary table rows and the cell styles of their risk band codes"""
+    table = df_summary_display[:SUMMARY_TABLE_ROWS].copy()
+    styles = pd.DataFrame('', index=table.index, columns=table.columns)
+    for i, col in enumerate(SCORE_COLUMNS):
+        styles[col] = RISK_BAND_STYLES[bands[:SUMMARY_TABLE_ROWS, i]]
+        if not pd.api.types.is_float_dtype(table[col].dtype):
+            # Scores mixed with text are formatted here; float columns by the Styler's precision
+            table[col] = table[col].map(lambda x: f'{x:.2f}' if pd.notna(x) and isinstance(x, (int, float)) else '-')
+    return table, styles
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _cached_summary_table(dataset_id, band_cols, _df_summary_display, _bands):
+    """Build the summary table of a dataset's month pair once and share it across reruns"""
+    return build_summary_table(_df_summary_display, _bands)
+
+def get_summary_table(dataset_id, band_cols, df_summary_display, bands):
+    """Return the summary table, reusing the one built for the same dataset and months"""
+    if dataset_id is None:
+        return build_summary_table(df_summary_display, bands)
+    return _cached_summary_table(dataset_id, tuple(band_cols), df_summary_display, bands)
+
+def category_table_parts(data_index, df_summary_display, band_cols, row):
+    """Return the summary table row of one risk category with its weighted score and score classification"""
+    table = df_summary_display.iloc[[row]].copy()
+    month = data_index['summary_score_positions'].get(band_cols[1]) if band_cols is not None else None
+    table['weighted'] = data_index['summary_weighted'][row, month] if month is not None else np.nan
+    classification = data_index['summary_classes'][row, month] if month is not None else None
+    table['score classification'] = classification if classification is not None else '-'
+    if band_cols is not None and data_index['summary_bands'] is not None:
+        bands = data_index['summary_bands'][[row]][:, band_cols]
+    else:
+        bands = risk_band_codes(table[SCORE_COLUMNS])
+    return build_summary_table(table, bands)
+
+def summary_table_parts(data_index, df_summary_display, band_cols, dataset_id=None, category_row=None):
+    """Return the summary table and its styles, using the risk bands classified when the dataset was indexed
+
+    With a `category_row` only that risk category is shown, with its weighted score and classification.
+    """
+    if category_row is not None:
+        return category_table_parts(data_index, df_summary_display, band_cols, category_row)
+    if band_cols is not None and data_index['summary_bands'] is not None:
+        bands = data_index['summary_bands'][:, band_cols]
+        return get_summary_table(dataset_id, band_cols, df_summary_display, bands)
+    return build_summary_table(df_summary_display, risk_band_codes(df_summary_display[SCORE_COLUMNS]))
+
+def summary_table_styler(table, styles):
+    """Return the Styler showing the summary table with its risk band colours"""
+    styler = table.style.apply(
+        lambda _: styles, axis=None
+    ).format(
+        precision=2, na_rep='-', subset=SCORE_COLUMNS
+    )
+    if CATEGORY_DETAIL_COLUMNS[0] in table.columns:
+        styler = styler.format(precision=3, na_rep='-', subset=CATEGORY_DETAIL_COLUMNS[:1])
+    return styler.set_properties(
+        **{'text-align': 'center'}
+    ).set_table_styles([
+        {'selector': 'th', 'props': [('text-align', 'center')]}
+    ])
+
+def summary_columns_for_date(data_index, df_summary, date, col_position, default_latest_col_idx=None):
+    """Return the Summary (present, previous) score column positions shown for a Data_YTD date"""
+    if col_position is not None and df_summary is not None:
+        # Summary columns of each Data_YTD date are worked out once per dataset
+        # (e.g. Apr-2025 maps to the April-2025 score columns)
+        summary_columns = data_index['summary_columns_by_date'].get(date)
+        if summary_columns is not None:
+            latest_col_idx, prev_col_idx = summary_columns
+            if prev_col_idx is None:
+                prev_col_idx = latest_col_idx - 3
+        else:
+            # Fallback calculation
+            latest_col_idx = (col_position * 3) + 2
+            prev_col_idx = latest_col_idx - 3
 
+        # Ensure the index is within bounds
+        if latest_col_idx >= len(df_summary.columns):
+            latest_col_idx = len(df_summary.columns) - 1
+            prev_col_idx = latest_col_idx - 3
+        return latest_col_idx, prev_col_idx
+
+    # Fallback: calculate from df_summary statically
+    row_0_numpy = df_summary.to_numpy()[0]
+    nan_mask = row_0_numpy == '-'
+    if nan_mask.any():
+        nan_indices = int(np.where(nan_mask)[0][0])
+        return nan_indices - 3, nan_indices - 6
+    latest_col_idx = default_latest_col_idx if default_latest_col_idx else len(df_summary.columns) - 1
+    return latest_col_idx, latest_col_idx - 3
+
+def summary_display_frame(df_summary, df_summary_present, latest_col_idx, prev_col_idx):
+    """Return the summary table frame of a month pair and the df_summary positions of its score columns
+
+    Falls back to `df_summary_present` (with no positions) when the columns cannot be read.
+    """
+    if df_summary is None or latest_col_idx is None:
+        return df_summary_present, None
+    try:
+        # Ensure indices are valid
+        if prev_col_idx >= 0 and latest_col_idx < len(df_summary.columns):
+            present_month_col = df_summary.columns[latest_col_idx]
+            prev_month_col = df_summary.columns[prev_col_idx]
+
+            # Check if 'Jenis Risiko' column exists
+            if 'Jenis Risiko' in df_summary.columns:
+                df_summary_display = df_summary[['Jenis Risiko', prev_month_col, present_month_col]].copy()
+            else:
+                # Use first column as risk category
+                df_summary_display = df_summary.iloc[:, [0, prev_col_idx, latest_col_idx]].copy()
+            df_summary_display.columns = ['Kategori Risiko', 'previous_month', 'present_month']
+            return df_summary_display, [prev_col_idx, latest_col_idx]
+    except Exception:
+        pass
+    return df_summary_present, None
+
+def present_score(data_index, df_summary_display, row=None):
+    """Return the present month score of a Summary row (the composite score by default), 0 when it cannot be read
+
+    Returns None when the workbook has no composite score row.
+    """
+    if row is None:
+        row = data_index['summary_metric_rows']['composite_score']
+        if row is None:
+            return None
+    try:
+        score = float(df_summary_display['present_month'].iloc[row])
+        return 0.0 if np.isnan(score) else score
+    except Exception:
+        return 0.0
+
+def score_change(data_index, latest_col_idx, row=None):
+    """Return the change of a Summary row's score (the composite score by default) against the previous month as caption text"""
+    summary_month = data_index['summary_score_positions'].get(latest_col_idx)
+    if row is None:
+        row = data_index['summary_metric_rows'].get('composite_score')
+    if summary_month is None or row is None:
+        return ""
+    try:
+        delta = data_index['summary_comparisons']['mom'][row, summary_month]
+    except Exception:
+        return ""
+    return "" if np.isnan(delta) else f" ({delta:+.2f} MoM)"
+
+def risk_type_options(data_index):
+    """Return the risk type selector entries: every category plus the overall view"""
+    return [OVERALL_RISK] + [name for name, row in data_index['risk_categories'].items() if row < SUMMARY_TABLE_ROWS]
+
+def category_history(data_index, row, latest_col_idx):
+    """Return the Summary months and scores of a risk category over the 12 months up to the present month"""
+    month = data_index['summary_score_positions'].get(latest_col_idx)
+    if month is None:
+        return [], []
+    window = slice(max(0, month - 11), month + 1)
+    return data_index['summary_months'][window], data_index['summary_scores'][row, window]
+
+# Formatting of a single metric value per display format
+VALUE_FORMATTERS = {
+    "value": format_value,
+    "percentage": format_percentage,
+    "count": lambda value: format_number(null_value(value)),
+}
+
+# Rolling averages of counts are fractional, so they get their own rounded format
+AVERAGE_FORMATTERS = dict(VALUE_FORMATTERS, count=format_average)
+
+def dashboard_dates(df_ytd, latest_col_ytd_idx):
+    """Return the Data_YTD dates that can be shown: the columns up to the latest month, excluding 'Parameter'"""
+    temp_col_position = df_ytd.columns.get_loc(latest_col_ytd_idx)
+    return [col for col in df_ytd.columns[:temp_col_position+1] if col != 'Parameter']
+
+def month_position(data_index, date):
+    """Return the column of a Data_YTD date in the month matrix"""
+    return data_index['ytd_month_positions'][date]
+
+def format_change(delta, pct, display_format):
+    """Format a change for a card: percentage points for ratios, units for counts, percent otherwise"""
+    if display_format == "percentage":
+        return f"{delta * 100:+.2f} pp"
+    if display_format == "count":
+        return f"{delta:+,.0f}"
+    if np.isnan(pct):
+        return None
+    return f"{pct * 100:+.1f}%"
+
+def metric_changes(data_index, row, position, display_format):
+    """Return the month-over-month and year-over-year change labels of one matrix cell"""
+    comparisons = data_index['ytd_comparisons']
+    changes = []
+    for name, label in (('mom', 'MoM'), ('yoy', 'YoY')):
+        delta = comparisons[name][row, position]
+        if np.isnan(delta):
+            continue
+        text = format_change(delta, comparisons[f'{name}_pct'][row, position], display_format)
+        if text is not None:
+            changes.append({"text": f"{text} {label}", "direction": int(np.sign(delta))})
+    return changes
+
+def metric_tooltip(data_index, row, position, display_format):
+    """Return the rolling averages of one matrix cell as tooltip text"""
+    comparisons = data_index['ytd_comparisons']
+    formatter = AVERAGE_FORMATTERS[display_format]
+    return f"3-month avg: {formatter(comparisons['rolling_3'][row, position])} | " \
+           f"12-month avg: {formatter(comparisons['rolling_12'][row, position])}"
+
+def kpi_cards(keys, data_index, latest_col_ytd_idx, missing):
+    """Return the card records of Data_YTD metrics at the selected date
+
+    Metrics that cannot be read show `missing` as their value, and metrics the
+    workbook lacks show '-'.
+    """
+    cards = []
+    for key in keys:
+        metric = YTD_METRICS[key]
+        card = {"title": metric["title"], "value": missing, "format": metric["format"], "subtitle": metric.get("subtitle")}
+        if data_index['metric_rows'].get(key) is None:
+            # Not a value that failed to read: the workbook has no such parameter
+            card["value"] = "-"
+        elif latest_col_ytd_idx:
+            try:
+                row, position = metric_row(data_index, key), month_position(data_index, latest_col_ytd_idx)
+                formatter = VALUE_FORMATTERS[metric["format"]]
+                card["value"] = formatter(data_index['ytd_matrix'][row, position])
+                # Trend context comes from the comparisons computed once per dataset
+                card["changes"] = metric_changes(data_index, row, position, metric["format"])
+                card["tooltip"] = metric_tooltip(data_index, row, position, metric["format"])
+            except Exception:
+                card["value"] = missing
+        cards.append(card)
+    return cards
+
+@timed("dashboard.page")
 def show_dashboard():
     """Display the risk management dashboard"""
 
     # Check if data is loaded
-    if st.session_state.df_summary is None or st.session_state.df_summary_present is None:
+    dataset = session_dataset()
+    if dataset is None or dataset.df_summary is None or dataset.df_summary_present is None:
         st.error("No data loaded. Please upload data first.")
         return
 
@@ -28,14 +313,34 @@ def show_dashboard():
             </div>
         ''', unsafe_allow_html=True)
 
+    show_dashboard_sections()
+
+@st.fragment
+@timed("dashboard.sections")
+def show_dashboard_sections():
+    """Display everything that depends on the selected date and risk type
+
+    Runs as a fragment so changing either does not rerun the page header, CSS and sidebar.
+    The fragment takes no arguments: Streamlit keeps them with the session, and
+    the dataset is looked up in the registry instead so an idle session holds none of it.
+    """
+    dataset = session_dataset()
+    if dataset is None:
+        st.error("No data loaded. Please upload data first.")
+        return
+    data_index = load_data_index(dataset)
+
+    # Metrics are found by parameter name; a renamed or missing parameter is shown as '-'
+    missing_parameters = unresolved_metrics(data_index)
+    if missing_parameters:
+        st.warning(f"Not found in the uploaded workbook, shown as '-': {', '.join(missing_parameters)}")
+
     # Date selector
-    date_col1, date_col2 = st.columns([1, 5])
+    date_col1, date_col2, _ = st.columns([1, 1, 4])
     selected_date = None
     with date_col1:
-        if st.session_state.latest_col_ytd_idx and st.session_state.df_ytd is not None:
-            # Get columns up to latest_col_ytd_idx, excluding 'Parameter'
-            temp_col_position = st.session_state.df_ytd.columns.get_loc(st.session_state.latest_col_ytd_idx)
-            available_dates = [col for col in st.session_state.df_ytd.columns[:temp_col_position+1] if col != 'Parameter']
+        if dataset.latest_col_ytd_idx and dataset.df_ytd is not None:
+            available_dates = dashboard_dates(dataset.df_ytd, dataset.latest_col_ytd_idx)
             if available_dates:
                 selected_date = st.selectbox(
                     "Select Date",
@@ -47,500 +352,212 @@ def show_dashboard():
         else:
             st.warning("No dates available")
 
-    # Get latest_col_ytd_idx from selected_date or session state
-    if selected_date and st.session_state.df_ytd is not None:
+    # Risk type drill-down; the rows of each category were found when the dataset was indexed
+    with date_col2:
+        risk_types = risk_type_options(data_index)
+        if st.session_state.get("risk_type") not in risk_types:
+            # A category of a previously loaded dataset
+            st.session_state.pop("risk_type", None)
+        risk_type = st.selectbox("Select Risk Type", risk_types, key="risk_type")
+    category_row = data_index['risk_categories'].get(risk_type) if risk_type != OVERALL_RISK else None
+
+    # Get latest_col_ytd_idx from selected_date or the dataset
+    if selected_date and dataset.df_ytd is not None:
         latest_col_ytd_idx = selected_date
-        col_position = st.session_state.df_ytd.columns.get_loc(selected_date)
-    elif st.session_state.latest_col_ytd_idx:
-        latest_col_ytd_idx = st.session_state.latest_col_ytd_idx
-        col_position = st.session_state.df_ytd.columns.get_loc(latest_col_ytd_idx)
+        col_position = dataset.df_ytd.columns.get_loc(selected_date)
+    elif dataset.latest_col_ytd_idx:
+        latest_col_ytd_idx = dataset.latest_col_ytd_idx
+        col_position = dataset.df_ytd.columns.get_loc(latest_col_ytd_idx)
     else:
         latest_col_ytd_idx = None
         col_position = None
 
-    # Calculate latest_col_idx based on col_position
-    # Map col_position from df_ytd to df_summary (assuming 3 columns per date in summary)
-    if col_position is not None and st.session_state.df_summary is not None:
-        # Find the column index in df_summary where column name contains selected_date
-        # Handle abbreviated month names (e.g., Apr-2025 matches April-2025)
-        month_mapping = {
-            'Jan': 'January', 'Feb': 'February', 'Mar': 'March', 'Apr': 'April',
-            'May': 'May', 'Jun': 'June', 'Jul': 'July', 'Aug': 'August',
-            'Sep': 'September', 'Oct': 'October', 'Nov': 'November', 'Dec': 'December'
-        }
-
-        def month_match(selected, col_name):
-            """Check if selected_date matches col_name, handling abbreviated months"""
-            selected_str = str(selected)
-            col_str = str(col_name)
-
-            # Direct substring match
-            if selected_str in col_str:
-                return True
-
-            # Check for abbreviated month matching full month
-            for abbr, full in month_mapping.items():
-                if abbr in selected_str and full in col_str:
-                    # Replace abbreviated month with full month and check
-                    expanded = selected_str.replace(abbr, full)
-                    if expanded in col_str:
-                        return True
-                # Also check reverse: if full month in selected and abbr in column
-                if full in selected_str and abbr in col_str:
-                    abbreviated = selected_str.replace(full, abbr)
-                    if abbreviated in col_str:
-                        return True
-
-            return False
-
-        matching_cols = np.where([month_match(selected_date, col) for col in st.session_state.df_summary.columns])[0]
-        if len(matching_cols) > 0:
-            latest_col_idx = int(matching_cols[-3])  # Get the last matching column
-            prev_col_idx = latest_col_idx-3
-        else:
-            # Fallback calculation
-            latest_col_idx = (col_position * 3) + 2
-            prev_col_idx = latest_col_idx - 3
-
-        # Ensure the index is within bounds
-        if latest_col_idx >= len(st.session_state.df_summary.columns):
-            latest_col_idx = len(st.session_state.df_summary.columns) - 1
-            prev_col_idx = latest_col_idx - 3
-    else:
-        # Fallback: calculate from df_summary statically
-        df_numpy = st.session_state.df_summary.to_numpy()
-        row_0_numpy = df_numpy[0]
-        nan_mask = row_0_numpy == '-'
-        if nan_mask.any():
-            nan_indices = int(np.where(nan_mask)[0][0])
-            latest_col_idx = nan_indices - 3
-            prev_col_idx = nan_indices - 6
-        else:
-            latest_col_idx = st.session_state.latest_col_idx if st.session_state.latest_col_idx else len(st.session_state.df_summary.columns) - 1
-            prev_col_idx = latest_col_idx - 3
-
-    # Calculate summary column indices based on selected date
-    if st.session_state.df_summary is not None and latest_col_idx is not None:
-        try:
-            # Ensure indices are valid
-            if prev_col_idx >= 0 and latest_col_idx < len(st.session_state.df_summary.columns):
-                present_month_col = st.session_state.df_summary.columns[latest_col_idx]
-                prev_month_col = st.session_state.df_summary.columns[prev_col_idx]
-
-                # Check if 'Jenis Risiko' column exists
-                if 'Jenis Risiko' in st.session_state.df_summary.columns:
-                    df_summary_display = st.session_state.df_summary[['Jenis Risiko', prev_month_col, present_month_col]].copy()
-                    df_summary_display.columns = ['Kategori Risiko', 'previous_month', 'present_month']
-                else:
-                    # Use first column as risk category
-                    df_summary_display = st.session_state.df_summary.iloc[:, [0, prev_col_idx, latest_col_idx]].copy()
-                    df_summary_display.columns = ['Kategori Risiko', 'previous_month', 'present_month']
-            else:
-                # Fallback to session state
-                df_summary_display = st.session_state.df_summary_present
-        except Exception as e:
-            # Fallback to session state
-            df_summary_display = st.session_state.df_summary_present
-    else:
-        # Fallback to session state
-        df_summary_display = st.session_state.df_summary_present
+    with span("dashboard.summary_columns"):
+        latest_col_idx, prev_col_idx = summary_columns_for_date(
+            data_index, dataset.df_summary, latest_col_ytd_idx, col_position, dataset.latest_col_idx
+        )
+        df_summary_display, summary_band_cols = summary_display_frame(
+            dataset.df_summary, dataset.df_summary_present, latest_col_idx, prev_col_idx
+        )
 
     col_summary, col_nps= st.columns([3, 2])
 
-    with col_summary:
+    with col_summary, span("dashboard.summary_table"):
         st.markdown('<div class="risk-table">', unsafe_allow_html=True)
 
         if df_summary_display is not None:
-            def color_cells(val):
-                try:
-                    val_float = float(val)
-                    if val_float <= 1.79:
-                        return 'background-color: #90d050'
-                    elif val_float <= 2.59:
-                        return 'background-color: #fff2cc'
-                    elif val_float <= 3.39:
-                        return 'background-color: #ffff00'
-                    elif val_float <= 4.19:
-                        return 'background-color: #ffc001'
-                    elif val_float <= 5:
-                        return 'background-color: #ff0000'
-                    else:
-                        return ''
-                except:
-                    return ''
-
-            # Format only numeric columns to 2 decimal places
-            format_dict = {}
-            for col in df_summary_display.columns:
-                if col in ['previous_month', 'present_month']:
-                    format_dict[col] = lambda x: f'{x:.2f}' if pd.notna(x) and isinstance(x, (int, float)) else '-'
-
-            styled_df = df_summary_display[:9].style.map(
-                color_cells,
-                subset=['previous_month', 'present_month']
-            ).format(
-                format_dict
-            ).set_properties(
-                **{'text-align': 'center'}
-            ).set_table_styles([
-                {'selector': 'th', 'props': [('text-align', 'center')]}
-            ])
+            with span("dashboard.summary_styler"):
+                styled_df = summary_table_styler(
+                    *summary_table_parts(data_index, df_summary_display, summary_band_cols, dataset.dataset_id, category_row)
+                )
             st.dataframe(styled_df, hide_index=True, use_container_width=True, height=350)
         else:
             st.warning("No data available. Please upload data first.")
 
         st.markdown('</div>', unsafe_allow_html=True)
 
-    with col_nps:
-        # Safely get the composite score from dynamic display data
-        try:
-            composite_score = float(df_summary_display['present_month'].iloc[10])
-        except:
-            composite_score = 0.0
+    with col_nps, span("dashboard.gauge"):
+        composite_score = present_score(data_index, df_summary_display, category_row)
 
         # Display selected date or latest date
-        display_date = selected_date if selected_date else (st.session_state.latest_col_ytd_idx if st.session_state.latest_col_ytd_idx else "N/A")
-        st.markdown(f"<p style='text-align: center;'><strong>Average Risk</strong><br>Composite Score in {display_date} is {composite_score:.2f}</p>", unsafe_allow_html=True)
-
-        fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=composite_score,
-            domain={'x': [0, 1], 'y': [0, 1]},
-            number={'font': {'size': 32}},
-            gauge={
-                'axis': {'range': [None, 5], 'tickwidth': 2},
-                'bar': {'color': "black", 'thickness': 0.3},
-                'bgcolor': "white",
-                'borderwidth': 2,
-                'steps': [
-                    {'range': [0, 1.80], 'color': '#90d050'},
-                    {'range': [1.80, 2.60], 'color': '#fff2cc'},
-                    {'range': [2.60, 3.40], 'color': '#ffff00'},
-                    {'range': [3.40, 4.20], 'color': '#ffc001'},
-                    {'range': [4.20, 5], 'color': '#ff0000'}
-                ],
-            }
-        ))
-        fig.update_layout(height=280, margin=dict(l=20, r=20, t=0, b=20))
+        display_date = selected_date if selected_date else (dataset.latest_col_ytd_idx if dataset.latest_col_ytd_idx else "N/A")
+        composite_change = score_change(data_index, latest_col_idx, category_row) if summary_band_cols is not None else ""
+        score_text = "-" if composite_score is None else f"{composite_score:.2f}"
+        if category_row is None:
+            st.markdown(f"<p style='text-align: center;'><strong>Average Risk</strong><br>Composite Score in {display_date} is {score_text}{composite_change}</p>", unsafe_allow_html=True)
+        else:
+            st.markdown(f"<p style='text-align: center;'><strong>{escape(risk_type)}</strong><br>Score in {display_date} is {score_text}{composite_change}</p>", unsafe_allow_html=True)
+
+        fig = gauge_figure(composite_score)
         st.plotly_chart(fig, use_container_width=True, key="nps_gauge")
 
-    # Dropdown for risk type
-    risk_types = ["Keseluruhan Risiko"]
-    if 'Jenis Risiko' in st.session_state.df_summary.columns:
-        risk_types.extend(st.session_state.df_summary['Jenis Risiko'][:9].tolist())
-
-    st.selectbox("Select Risk Type", risk_types, label_visibility="collapsed")
-
-    # Financial Metrics Section
-    titles = ["Jumlah Aset", "Jumlah Utang", "Jumlah Ekuitas", "Jumlah Polis", "Kas dan Bank", "Aset Investasi", "RBC"]
-
-    # Create 7 columns: 6 equal-sized, 1 larger for RBC
-    col1, col2, col3, col4, col5, col6, col7 = st.columns([1, 1, 1, 1, 1, 1, 1.5])
-    cols = [col1, col2, col3, col4, col5, col6, col7]
-    value_idx = [9,14,15,116,5,0,51]
-
-    # Display all 7 containers
-    for i, col in enumerate(cols):
-        with col:
-            with st.container(border=True):
-                # Display title
-                st.markdown(f"<div style='text-align: center; color: #999; font-size: 12px;'>{titles[i]}</div>", unsafe_allow_html=True)
-                # Get value from df_ytd
-                if st.session_state.df_ytd is not None and latest_col_ytd_idx:
-                    try:
-                        value = st.session_state.df_ytd[latest_col_ytd_idx].iloc[value_idx[i]]
-                        # Format value for display (except RBC which stays as percentage)
-                        if i == 6:  # RBC - display as percentage
-                            formatted_value = format_percentage(value)
-                            st.markdown(f"<div style='text-align: center; font-size: 32px; font-weight: bold; color: #ff6347; margin: 5px 0;'>{formatted_value}</div>", unsafe_allow_html=True)
-                            st.markdown("<div style='text-align: center; color: #666; font-size: 11px; margin-top: 5px;'>Minimal 120% dari OJK</div>", unsafe_allow_html=True)
-                        else:  # Format other values in mil/bil
-                            formatted_value = format_value(value)
-                            st.markdown(f"<div style='text-align: center; font-size: 24px; font-weight: bold; color: #333; margin: 5px 0;'>{formatted_value}</div>", unsafe_allow_html=True)
-                    except:
-                        st.markdown("<div style='text-align: center; font-size: 24px; font-weight: bold; color: #333; margin: 5px 0;'>-</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<div style='text-align: center; font-size: 24px; font-weight: bold; color: #333; margin: 5px 0;'>-</div>", unsafe_allow_html=True)
+        # Score history of the selected category
+        if category_row is not None:
+            months, scores = category_history(data_index, category_row, latest_col_idx)
+            if len(months):
+                fig_history = get_figure(
+                    dataset.dataset_id, latest_col_ytd_idx, f"risk_{category_row}", "grid",
+                    lambda: line_figure(f"{risk_type} Score", months, scores, "grid")
+                )
+                st.plotly_chart(fig_history, use_container_width=True, key="risk_history")
+
+    # Financial Metrics Section: 6 equal-sized cards, 1 larger for RBC
+    with span("dashboard.kpi_cards"):
+        render_kpi_grid(
+            [[card] for card in kpi_cards(KPI_CARDS, data_index, latest_col_ytd_idx, missing="-")],
+            widths=[1, 1, 1, 1, 1, 1, 1.5],
+        )
 
     # Line Graphs and Pie Charts Section
     col_graphs, col_pies = st.columns(2)
 
     # First column - Line Graphs with Tabs
     with col_graphs:
-        # Line graph titles
-        line_titles = ["Jumlah Pendapatan", "Premi Bruto (All)", "Klaim Bruto (All)", "Total Laba (Rugi) Komprehensif"]
+        show_line_charts(latest_col_ytd_idx)
+
+    # Second column - Pie Charts with Tabs
+    with col_pies:
+        show_pie_charts(latest_col_ytd_idx)
 
-        # Create tabs
-        tabs_line = st.tabs(["All Graphs", line_titles[0], line_titles[1], line_titles[2], line_titles[3]])
+    # Additional Metrics Section - 3 columns with multiple rows
+    with span("dashboard.compliance_cards"):
+        render_kpi_grid([kpi_cards(keys, data_index, latest_col_ytd_idx, missing="0") for keys in COMPLIANCE_COLUMNS])
+
+@st.fragment
+@timed("dashboard.line_charts")
+def show_line_charts(latest_col_ytd_idx):
+    """Display the line chart tabs of the 12 months up to the selected date"""
+    dataset = session_dataset()
+    if dataset is None:
+        st.warning("No data available for line graphs")
+        return
+    dataset_id, data_index = dataset.dataset_id, load_data_index(dataset)
 
-        # Get present_col_ytd (last 12 months from latest_col_ytd_idx)
-        if st.session_state.df_ytd is not None and latest_col_ytd_idx:
-            try:
-                col_position = st.session_state.df_ytd.columns.get_loc(latest_col_ytd_idx)
-                present_col_ytd = st.session_state.df_ytd.columns[max(0, col_position - 11):col_position + 1]
+    # Line graph titles
+    line_titles = [YTD_METRICS[key]["title"] for key in LINE_CHARTS]
 
-                # Tab 0: All Graphs - 2x2 Grid Layout
-                value_idx = [3, 16, 26, 43]
+    # Create tabs
+    tabs_line, open_line = lazy_tabs(["All Graphs", line_titles[0], line_titles[1], line_titles[2], line_titles[3]], "line_tabs")
+
+    # Get present_col_ytd (last 12 months from latest_col_ytd_idx)
+    if latest_col_ytd_idx:
+        try:
+            col_position = month_position(data_index, latest_col_ytd_idx)
+            window = slice(max(0, col_position - 11), col_position + 1)
+            present_col_ytd = data_index['ytd_months'][window]
+
+            def metric_series(key):
+                """Return the values of one metric over present_col_ytd (a view of the month matrix)"""
+                return data_index['ytd_matrix'][metric_row(data_index, key), window]
+
+            # Tab 0: All Graphs - 2x2 Grid Layout
+            # Only the selected tab is computed; the others render when opened
+            if open_line[0]:
                 with tabs_line[0]:
-                    # First row - 2 columns
-                    col1_row1, col2_row1 = st.columns(2)
-
-                    # Graph 1: Jumlah Pendapatan (left column, row 1)
-                    with col1_row1:
-                        try:
-                            dates = [col for col in present_col_ytd]
-                            values = [st.session_state.df_ytd[col].iloc[value_idx[0]] for col in present_col_ytd]
-
-                            fig_line = go.Figure()
-                            fig_line.add_trace(go.Scatter(
-                                x=dates, y=values, mode='lines+markers',
-                                name=line_titles[0], line=dict(width=2), marker=dict(size=6)
-                            ))
-                            fig_line.update_layout(
-                                title=line_titles[0], height=250,
-                                margin=dict(l=40, r=20, t=40, b=30),
-                                xaxis=dict(showgrid=True), yaxis=dict(showgrid=True),
-                                plot_bgcolor='white'
-                            )
-                            st.plotly_chart(fig_line, use_container_width=True, key="line_all_0")
-                        except:
-                            st.warning(f"Unable to load data for {line_titles[0]}")
-
-                    # Graph 2: Premi Bruto (right column, row 1)
-                    with col2_row1:
-                        try:
-                            dates = [col for col in present_col_ytd]
-                            values = [st.session_state.df_ytd[col].iloc[value_idx[1]] for col in present_col_ytd]
-
-                            fig_line = go.Figure()
-                            fig_line.add_trace(go.Scatter(
-                                x=dates, y=values, mode='lines+markers',
-                                name=line_titles[1], line=dict(width=2), marker=dict(size=6)
-                            ))
-                            fig_line.update_layout(
-                                title=line_titles[1], height=250,
-                                margin=dict(l=40, r=20, t=40, b=30),
-                                xaxis=dict(showgrid=True), yaxis=dict(showgrid=True),
-                                plot_bgcolor='white'
-                            )
-                            st.plotly_chart(fig_line, use_container_width=True, key="line_all_1")
-                        except:
-                            st.warning(f"Unable to load data for {line_titles[1]}")
-
-                    # Second row - 2 columns
-                    col1_row2, col2_row2 = st.columns(2)
-
-                    # Graph 3: Klaim Bruto (left column, row 2)
-                    with col1_row2:
-                        try:
-                            dates = [col for col in present_col_ytd]
-                            values = [st.session_state.df_ytd[col].iloc[value_idx[2]] for col in present_col_ytd]
-
-                            fig_line = go.Figure()
-                            fig_line.add_trace(go.Scatter(
-                                x=dates, y=values, mode='lines+markers',
-                                name=line_titles[2], line=dict(width=2), marker=dict(size=6)
-                            ))
-                            fig_line.update_layout(
-                                title=line_titles[2], height=250,
-                                margin=dict(l=40, r=20, t=40, b=30),
-                                xaxis=dict(showgrid=True), yaxis=dict(showgrid=True),
-                                plot_bgcolor='white'
-                            )
-                            st.plotly_chart(fig_line, use_container_width=True, key="line_all_2")
-                        except:
-                            st.warning(f"Unable to load data for {line_titles[2]}")
-
-                    # Graph 4: Laba Rugi Komprehensif (right column, row 2)
-                    with col2_row2:
-                        try:
-                            dates = [col for col in present_col_ytd]
-                            values = [st.session_state.df_ytd[col].iloc[value_idx[3]] for col in present_col_ytd]
-
-                            fig_line = go.Figure()
-                            fig_line.add_trace(go.Scatter(
-                                x=dates, y=values, mode='lines+markers',
-                                name=line_titles[3], line=dict(width=2), marker=dict(size=6)
-                            ))
-                            fig_line.update_layout(
-                                title=line_titles[3], height=250,
-                                margin=dict(l=40, r=20, t=40, b=30),
-                                xaxis=dict(showgrid=True), yaxis=dict(showgrid=True),
-                                plot_bgcolor='white'
-                            )
-                            st.plotly_chart(fig_line, use_container_width=True, key="line_all_3")
-                        except:
-                            st.warning(f"Unable to load data for {line_titles[3]}")
-
-                # Tabs 1-4: Individual Graphs
-                value_idx = [25, 16, 26, 43]
-                for tab_idx in range(1, 5):
-                    with tabs_line[tab_idx]:
-                        try:
-                            title = line_titles[tab_idx - 1]
-                            dates = [col for col in present_col_ytd]
-                            values = [st.session_state.df_ytd[col].iloc[value_idx[tab_idx - 1]] for col in present_col_ytd]
-
-                            fig_line = go.Figure()
-                            fig_line.add_trace(go.Scatter(
-                                x=dates,
-                                y=values,
-                                mode='lines+markers',
-                                name=title,
-                                line=dict(width=3),
-                                marker=dict(size=8)
-                            ))
-                            fig_line.update_layout(
-                                title=title,
-                                height=450,
-                                margin=dict(l=40, r=20, t=40, b=30),
-                                xaxis=dict(showgrid=True),
-                                yaxis=dict(showgrid=True),
-                                plot_bgcolor='white'
-                            )
-                            st.plotly_chart(fig_line, use_container_width=True, key=f"line_single_{tab_idx}")
-                        except:
-                            st.warning(f"Unable to load data")
-            except:
-                st.warning("Unable to load line graph data")
-        else:
-            st.warning("No data available for line graphs")
+                    grid = st.columns(2) + st.columns(2)
+                    for i, key in enumerate(LINE_CHARTS):
+                        with grid[i]:
+                            try:
+                                fig_line = get_figure(
+                                    dataset_id, latest_col_ytd_idx, key, "grid",
+                                    lambda i=i, key=key: line_figure(line_titles[i], present_col_ytd, metric_series(key), "grid")
+                                )
+                                st.plotly_chart(fig_line, use_container_width=True, key=f"line_all_{i}")
+                            except:
+                                st.warning(f"Unable to load data for {line_titles[i]}")
+
+            # Tabs 1-4: Individual Graphs
+            for tab_idx in range(1, 5):
+                if not open_line[tab_idx]:
+                    continue
+                with tabs_line[tab_idx]:
+                    try:
+                        key = LINE_CHARTS[tab_idx - 1]
+                        fig_line = get_figure(
+                            dataset_id, latest_col_ytd_idx, key, "single",
+                            lambda key=key: line_figure(line_titles[tab_idx - 1], present_col_ytd, metric_series(key), "single")
+                        )
+                        st.plotly_chart(fig_line, use_container_width=True, key=f"line_single_{tab_idx}")
+                    except:
+                        st.warning(f"Unable to load data")
+        except:
+            st.warning("Unable to load line graph data")
+    else:
+        st.warning("No data available for line graphs")
+
+@st.fragment
+@timed("dashboard.pie_charts")
+def show_pie_charts(latest_col_ytd_idx):
+    """Display the investment portfolio pie chart tabs of the selected date"""
+    dataset = session_dataset()
+    if dataset is None:
+        st.warning("No data available for pie charts")
+        return
+    dataset_id, data_index = dataset.dataset_id, load_data_index(dataset)
 
-    # Second column - Pie Charts with Tabs
-    with col_pies:
-        # Pie chart titles
-        pie_titles = ["Deposito Berjangka", "Obligasi Korporasi", "Surat Berharga yang Diterbitkan oleh Negara RI", "Reksa Dana"]
-        value_idx = [1,2,3,4]
-        # Create tabs
-        tabs_pie = st.tabs(["All Graphs", pie_titles[0], pie_titles[1], pie_titles[2], pie_titles[3]])
+    # Pie chart titles
+    pie_titles = [YTD_METRICS[key]["title"] for key in PIE_CHARTS]
+    # Create tabs
+    tabs_pie, open_pie = lazy_tabs(["All Graphs", pie_titles[0], pie_titles[1], pie_titles[2], pie_titles[3]], "pie_tabs")
 
-        if st.session_state.df_ytd is not None and latest_col_ytd_idx:
-            try:
-                col_position = st.session_state.df_ytd.columns.get_loc(latest_col_ytd_idx)
-                present_col_ytd = st.session_state.df_ytd.columns[max(0, col_position - 11):col_position + 1]
+    if latest_col_ytd_idx:
+        try:
+            value_idx = [metric_row(data_index, key) for key in PIE_CHARTS]
+            latest_values = data_index['ytd_matrix'][:, month_position(data_index, latest_col_ytd_idx)]
 
-                # Tab 0: All Graphs - Single Pie Chart with All Categories
+            # Tab 0: All Graphs - Single Pie Chart with All Categories
+            if open_pie[0]:
                 with tabs_pie[0]:
                     try:
-                        # Get values for all four categories
-                        labels = []
-                        values_pie = []
-
-                        for idx, title in enumerate(pie_titles):
-                            value = st.session_state.df_ytd[latest_col_ytd_idx].iloc[value_idx[idx]]
-                            value_float = float(value) if pd.notna(value) else 0
-                            labels.append(title)
-                            values_pie.append(value_float)
-
-                        # Create pie chart with all four categories
-                        fig_pie = go.Figure(data=[go.Pie(
-                            labels=labels,
-                            values=values_pie,
-                            hole=0.3,
-                            textinfo='label+percent',
-                            textposition='auto'
-                        )])
-                        fig_pie.update_layout(
-                            title="Distribusi Portfolio Investasi",
-                            height=400,
-                            margin=dict(l=10, r=10, t=40, b=80),
-                            showlegend=True,
-                            legend=dict(
-                                orientation="h",
-                                yanchor="bottom",
-                                y=-0.3,
-                                xanchor="center",
-                                x=0.5
+                        # Get values for all four categories in one read of the month column
+                        fig_pie = get_figure(
+                            dataset_id, latest_col_ytd_idx, "portfolio", "pie",
+                            lambda: portfolio_pie_figure(
+                                pie_titles, np.nan_to_num(latest_values[value_idx]).tolist()
                             )
                         )
                         st.plotly_chart(fig_pie, use_container_width=True, key="pie_all_combined")
                     except Exception as e:
                         st.warning(f"Unable to load pie chart data: {str(e)}")
 
-                # Tabs 1-4: Individual Pie Charts - Full portion of each investment type
-                for tab_idx in range(1, 5):
-                    with tabs_pie[tab_idx]:
-                        try:
-                            title = pie_titles[tab_idx - 1]
-                            value = st.session_state.df_ytd[latest_col_ytd_idx].iloc[value_idx[tab_idx - 1]]
-                            value_float = float(value) if pd.notna(value) else 0
-
-                            # Create full pie chart showing 100% of this investment type
-                            labels = [title]
-                            values_pie = [100]  # Full 100% pie
-
-                            fig_pie = go.Figure(data=[go.Pie(
-                                labels=labels,
-                                values=values_pie,
-                                hole=0.3,
-                                textinfo='label+value',
-                                textposition='inside',
-                                text=[f"{value_float}"]
-                            )])
-                            fig_pie.update_layout(
-                                title=f"{title}: {value_float}",
-                                height=450,
-                                margin=dict(l=20, r=20, t=40, b=20),
-                                showlegend=False
-                            )
-                            st.plotly_chart(fig_pie, use_container_width=True, key=f"pie_single_{tab_idx}")
-                        except Exception as e:
-                            st.warning(f"Unable to load data: {str(e)}")
-            except:
-                st.warning("Unable to load pie chart data")
-        else:
-            st.warning("No data available for pie charts")
-
-    # Additional Metrics Section - 3 columns with multiple rows
-    col_a, col_b, col_c = st.columns(3)
-    value_idx = [139,141,143]
-
-    # First column - 3 rows
-    with col_a:
-        titles_col_a = ["Jumlah Pengaduan", "Indak Lanjut Pengaduan", "Jumlah Pemberitaan Negatif Dalam 1 Tahun"]
-        for i, title in enumerate(titles_col_a):
-            with st.container(border=True):
-                st.markdown(f"<div style='text-align: center; color: #999; font-size: 12px;'>{title}</div>", unsafe_allow_html=True)
-                if st.session_state.df_ytd is not None and latest_col_ytd_idx:
+            # Tabs 1-4: Individual Pie Charts - Full portion of each investment type
+            for tab_idx in range(1, 5):
+                if not open_pie[tab_idx]:
+                    continue
+                with tabs_pie[tab_idx]:
                     try:
-                        # Offset index by 7 since previous section used 0-6
-                        value = null_value(st.session_state.df_ytd[latest_col_ytd_idx].iloc[value_idx[i]])
-                        st.markdown(f"<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>{value}</div>", unsafe_allow_html=True)
-                    except:
-                        st.markdown("<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>0</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>0</div>", unsafe_allow_html=True)
-
-    # Second column - 2 rows
-    with col_b:
-        titles_col_b = ["Jumlah Fraud","Jumlah Gugatan", "Jumlah Nominal Gugatan Yang Sedang Diajukan"]
-        value_idx = [117,132,133]
-        for i, title in enumerate(titles_col_b):
-            with st.container(border=True):
-                st.markdown(f"<div style='text-align: center; color: #999; font-size: 12px;'>{title}</div>", unsafe_allow_html=True)
-                if st.session_state.df_ytd is not None and latest_col_ytd_idx:
-                    try:
-                        # Offset index by 10 (7 from first section + 3 from col_a)
-                        value = null_value(st.session_state.df_ytd[latest_col_ytd_idx].iloc[value_idx[i]])
-                        st.markdown(f"<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>{value}</div>", unsafe_allow_html=True)
-                    except:
-                        st.markdown("<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>0</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>0</div>", unsafe_allow_html=True)
-
-    # Third column - 2 rows
-    with col_c:
-        titles_col_c = ["Jumlah Pelanggaran Atas Ketentuan", "Jumlah Denda"]
-        value_idx = [134,137]
-        for i, title in enumerate(titles_col_c):
-            with st.container(border=True):
-                st.markdown(f"<div style='text-align: center; color: #999; font-size: 12px;'>{title}</div>", unsafe_allow_html=True)
-                if st.session_state.df_ytd is not None and latest_col_ytd_idx:
-                    try:
-                        # Offset index by 12 (7 + 3 + 2)
-                        value = null_value(st.session_state.df_ytd[latest_col_ytd_idx].iloc[value_idx[i]])
-                        st.markdown(f"<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>{value}</div>", unsafe_allow_html=True)
-                    except:
-                        st.markdown("<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>0</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<div style='text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;'>0</div>", unsafe_allow_html=True)
+                        title = pie_titles[tab_idx - 1]
+                        value = latest_values[value_idx[tab_idx - 1]]
+                        value_float = float(value) if pd.notna(value) else 0
+
+                        fig_pie = get_figure(
+                            dataset_id, latest_col_ytd_idx, PIE_CHARTS[tab_idx - 1], "pie",
+                            lambda: single_pie_figure(title, value_float)
+                        )
+                        st.plotly_chart(fig_pie, use_container_width=True, key=f"pie_single_{tab_idx}")
+                    except Exception as e:
+                        st.warning(f"Unable to load data: {str(e)}")
+        except:
+            st.warning("Unable to load pie chart data")
+    else:
+        st.warning("No data available for pie charts")
@@ -0,0 +1,94 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from snapshot_store import save_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Parse cache limits (shared by every session in this server process)
+CACHE_MAX_ENTRIES = 16
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_TTL_SECONDS = 6 * 60 * 60
+
+# file_hash -> (expires_at, nbytes, result), least recently used first
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def file_fingerprint(file_bytes):
+    """Return the content hash used as the cache key for a workbook"""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def update_fingerprint(base_id, file_hash):
+    """Return the key of an incremental result: the workbook hash combined with the dataset it extends
+
+    The months kept from the base make the result differ from a full parse of the
+    same bytes, so it must never be found under the workbook hash alone.
+    """
+    return hashlib.sha256(f"{base_id}+{file_hash}".encode("ascii")).hexdigest()
+
+
+def result_nbytes(result):
+    """Estimate the memory held by the dataframes of a processed result"""
+    total = 0
+    for df in result[:3]:
+        if df is not None:
+            total += int(df.memory_usage(index=True, deep=True).sum())
+    return total
+
+
+def _evict_locked(now):
+    """Drop expired entries, then least recently used ones until within limits"""
+    for key in [key for key, (expires_at, _, _) in _cache.items() if expires_at <= now]:
+        del _cache[key]
+
+    total = sum(nbytes for _, nbytes, _ in _cache.values())
+    while _cache and (len(_cache) > CACHE_MAX_ENTRIES or total > CACHE_MAX_BYTES):
+        _, (_, nbytes, _) = _cache.popitem(last=False)
+        total -= nbytes
+
+
+def get_cached_result(file_hash):
+    """Return the cached processing result for a file hash, or None"""
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(file_hash)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del _cache[file_hash]
+            return None
+        _cache.move_to_end(file_hash)
+        return entry[2]
+
+
+def put_cached_result(file_hash, result):
+    """Store a processing result under its file hash"""
+    nbytes = result_nbytes(result)
+    if nbytes > CACHE_MAX_BYTES:
+        return
+    now = time.monotonic()
+    with _cache_lock:
+        _cache[file_hash] = (now + CACHE_TTL_SECONDS, nbytes, result)
+        _cache.move_to_end(file_hash)
+        _evict_locked(now)
+
+
+def drop_cached_result(file_hash):
+    """Remove the cached result of a file hash, if any"""
+    with _cache_lock:
+        _cache.pop(file_hash, None)
+
+
+def store_result(file_hash, result):
+    """Cache a successfully processed workbook and save it as a snapshot"""
+    put_cached_result(file_hash, result)
+    try:
+        save_snapshot(result, file_hash)
+    except Exception:
+        # The upload itself succeeded; a missing snapshot only costs a re-upload later
+        logger.warning("Could not save snapshot for %s", file_hash, exc_info=True)
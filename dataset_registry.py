@@ -0,0 +1,298 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from data_cache import drop_cached_result, get_cached_result, result_nbytes
+from preprocess_data import build_data_index
+from snapshot_catalog import find_snapshot
+from snapshot_store import load_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Datasets no session refers to any more are kept for a while so a returning
+# viewer or a re-upload of the same workbook does not reload them
+REGISTRY_MAX_UNUSED = 4
+REGISTRY_UNUSED_TTL_SECONDS = 30 * 60
+
+# Server-wide memory budget of the registered datasets and their indexes. Above it,
+# unused datasets go first, then those of sessions idle for SESSION_IDLE_SECONDS;
+# an idle session reloads its dataset from the snapshot store when it comes back.
+REGISTRY_BUDGET_BYTES = int(os.environ.get("RISK_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024
+SESSION_IDLE_SECONDS = 10 * 60
+
+# A processed workbook as shared by every session viewing it. Sessions only keep
+# its id; the frames are never modified in place (pandas 3 always copies on write,
+# so any change a session makes to them is a private copy) and the arrays of its
+# data index are read-only.
+Dataset = namedtuple("Dataset", ["dataset_id", "df_ytd", "df_summary", "df_summary_present",
+                                 "latest_col_idx", "latest_col_ytd_idx"])
+
+# dataset_id -> {"dataset", "nbytes", "data_index", "sessions" (ids of the sessions using it), "released_at"}
+_datasets = {}
+_sessions = {}  # session id -> {"dataset_id", "seen_at"}
+_registry_lock = threading.Lock()
+
+
+def _session_alive(session_id):
+    """Return whether a session is still connected to this server"""
+    if not runtime.exists():
+        # Bare scripts and app tests have no session manager to ask
+        return True
+    return runtime.get_instance().is_active_session(session_id)
+
+
+def _index_nbytes(data_index):
+    """Return the bytes held by the arrays a data index owns (views of the frames are not counted)"""
+    total = 0
+    for value in data_index.values():
+        arrays = value.values() if isinstance(value, dict) else [value]
+        for array in arrays:
+            if isinstance(array, np.ndarray) and array.base is None:
+                total += array.nbytes
+    return total
+
+
+def _total_nbytes_locked():
+    """Return the bytes held by every registered dataset"""
+    return sum(entry["nbytes"] for entry in _datasets.values())
+
+
+def _evict_locked(dataset_id):
+    """Forget a dataset; one that can be reloaded from its snapshot also leaves the parse cache"""
+    del _datasets[dataset_id]
+    if find_snapshot(dataset_id) is not None:
+        drop_cached_result(dataset_id)
+
+
+def _enforce_budget_locked(now):
+    """Evict unused datasets, then the datasets of idle sessions, until within the memory budget"""
+    total = _total_nbytes_locked()
+    if total <= REGISTRY_BUDGET_BYTES:
+        return
+
+    for released_at, dataset_id in sorted(
+        (entry["released_at"], dataset_id) for dataset_id, entry in _datasets.items() if not entry["sessions"]
+    ):
+        if total <= REGISTRY_BUDGET_BYTES:
+            return
+        total -= _datasets[dataset_id]["nbytes"]
+        _evict_locked(dataset_id)
+
+    idle = sorted(
+        (session["seen_at"], session_id) for session_id, session in _sessions.items()
+        if now - session["seen_at"] > SESSION_IDLE_SECONDS
+    )
+    for _, session_id in idle:
+        if total <= REGISTRY_BUDGET_BYTES:
+            return
+        dataset_id = _sessions[session_id]["dataset_id"]
+        entry = _datasets.get(dataset_id)
+        # Datasets without a snapshot could not be brought back, so they stay
+        if entry is None or find_snapshot(dataset_id) is None:
+            continue
+        _detach_locked(session_id, now)
+        if not entry["sessions"]:
+            total -= entry["nbytes"]
+            _evict_locked(dataset_id)
+
+    if total > REGISTRY_BUDGET_BYTES:
+        logger.warning("Datasets in use take %.0f MiB, over the %.0f MiB budget",
+                       total / 2**20, REGISTRY_BUDGET_BYTES / 2**20)
+
+
+def _prune_locked(now):
+    """Drop the references of closed sessions and unused datasets past the TTL or limit, then apply the budget"""
+    for session_id in [sid for sid in _sessions if not _session_alive(sid)]:
+        _detach_locked(session_id, now)
+
+    unused = sorted(
+        (entry["released_at"], dataset_id) for dataset_id, entry in _datasets.items() if not entry["sessions"]
+    )
+    expired = [dataset_id for released_at, dataset_id in unused if now - released_at > REGISTRY_UNUSED_TTL_SECONDS]
+    over_limit = [dataset_id for _, dataset_id in unused[:max(0, len(unused) - REGISTRY_MAX_UNUSED)]]
+    for dataset_id in set(expired) | set(over_limit):
+        del _datasets[dataset_id]
+
+    _enforce_budget_locked(now)
+
+
+def _detach_locked(session_id, now):
+    """Remove a session's reference to its dataset"""
+    session = _sessions.pop(session_id, None)
+    entry = _datasets.get(session["dataset_id"]) if session is not None else None
+    if entry is not None:
+        entry["sessions"].discard(session_id)
+        if not entry["sessions"]:
+            entry["released_at"] = now
+
+
+def register_dataset(dataset_id, result):
+    """Add a processed result under its content fingerprint and return the shared Dataset
+
+    A dataset already registered under the id is returned as is, so sessions
+    loading the same workbook share one copy.
+    """
+    with _registry_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None:
+            entry = {
+                "dataset": Dataset(dataset_id, *result[:5]), "nbytes": result_nbytes(result),
+                "data_index": None, "sessions": set(), "released_at": time.monotonic(),
+            }
+            _datasets[dataset_id] = entry
+        return entry["dataset"]
+
+
+def _reload(dataset_id):
+    """Return the processed result of an unregistered dataset from the parse cache or its snapshot, or None"""
+    result = get_cached_result(dataset_id)
+    if result is not None:
+        return result
+    snapshot_id = find_snapshot(dataset_id)
+    if snapshot_id is None:
+        return None
+    try:
+        return load_snapshot(snapshot_id)
+    except Exception:
+        logger.warning("Could not load snapshot %s", snapshot_id, exc_info=True)
+        return None
+
+
+def get_dataset(dataset_id):
+    """Return the registered Dataset of an id, reloading it if it was evicted, or None"""
+    with _registry_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is not None:
+            return entry["dataset"]
+    result = _reload(dataset_id)
+    return register_dataset(dataset_id, result) if result is not None else None
+
+
+def dataset_index(dataset):
+    """Return the row lookups and comparisons of a dataset, built once and evicted with it"""
+    with _registry_lock:
+        entry = _datasets.get(dataset.dataset_id)
+        if entry is not None and entry["data_index"] is not None:
+            return entry["data_index"]
+
+    data_index = build_data_index(dataset.df_ytd, dataset.df_summary)
+    with _registry_lock:
+        entry = _datasets.get(dataset.dataset_id)
+        if entry is not None and entry["dataset"] is dataset:
+            if entry["data_index"] is None:
+                entry["data_index"] = data_index
+                entry["nbytes"] += _index_nbytes(data_index)
+            return entry["data_index"]
+    return data_index
+
+
+def attach_session(session_id, dataset_id):
+    """Make a session refer to a registered dataset, releasing the one it used before"""
+    now = time.monotonic()
+    with _registry_lock:
+        session = _sessions.get(session_id)
+        if session is None or session["dataset_id"] != dataset_id:
+            _detach_locked(session_id, now)
+            entry = _datasets.get(dataset_id)
+            if entry is not None:
+                entry["sessions"].add(session_id)
+                _sessions[session_id] = {"dataset_id": dataset_id, "seen_at": now}
+        _prune_locked(now)
+
+
+def touch_session(session_id):
+    """Record that a session is active; returns False when it no longer refers to a dataset"""
+    session = _sessions.get(session_id)
+    if session is None:
+        return False
+    session["seen_at"] = time.monotonic()
+    return True
+
+
+def registry_stats():
+    """Return the datasets held, the sessions referring to them and their memory against the budget"""
+    with _registry_lock:
+        return {
+            "datasets": len(_datasets),
+            "unused_datasets": sum(1 for entry in _datasets.values() if not entry["sessions"]),
+            "sessions": len(_sessions),
+            "nbytes": _total_nbytes_locked(),
+            "budget_bytes": REGISTRY_BUDGET_BYTES,
+        }
+
+
+def _session_id():
+    """Return the id of the session running the script, or None outside a session"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def set_session_dataset(dataset_id, result):
+    """Register a processed result and make it the current session's dataset"""
+    dataset = register_dataset(dataset_id, result)
+    session_id = _session_id()
+    if session_id is not None:
+        attach_session(session_id, dataset_id)
+    st.session_state.dataset_id = dataset_id
+    return dataset
+
+
+def session_dataset():
+    """Return the Dataset of the current session, or None when no data is loaded
+
+    A dataset evicted while the session was idle is reloaded here.
+    """
+    dataset_id = st.session_state.get("dataset_id")
+    if dataset_id is None:
+        return None
+    dataset = get_dataset(dataset_id)
+    if dataset is None:
+        # Neither registered, cached nor saved any more
+        st.session_state.dataset_id = None
+        return None
+    session_id = _session_id()
+    if session_id is not None and not touch_session(session_id):
+        attach_session(session_id, dataset_id)
+    return dataset
+
+
+def _value_nbytes(value):
+    """Estimate the memory held by one session state value"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "getbuffer"):
+        # Uploaded files and other in-memory buffers
+        return value.getbuffer().nbytes
+    return sys.getsizeof(value)
+
+
+def session_footprint():
+    """Return the memory of the current session: its own state and its share of the dataset it views"""
+    session_bytes = 0
+    for key in list(st.session_state.keys()):
+        try:
+            session_bytes += _value_nbytes(st.session_state[key])
+        except Exception:
+            continue
+
+    dataset_bytes, viewers = 0, 0
+    with _registry_lock:
+        entry = _datasets.get(st.session_state.get("dataset_id"))
+        if entry is not None:
+            dataset_bytes, viewers = entry["nbytes"], len(entry["sessions"])
+    return {"session_bytes": session_bytes, "dataset_bytes": dataset_bytes, "dataset_sessions": viewers}
@@ -0,0 +1,258 @@
+"""Export the dashboard of every month to static HTML files without a Streamlit server.
+
+Each page shows what the dashboard shows for one date: the summary table, the
+composite score gauge, the KPI cards, the line and pie charts and the compliance
+cards, built with the same helpers as the app. Pages are rendered on a process pool.
+
+Example:
+    python export_dashboard.py --workbook risk.xlsx --output exports/2024
+    python export_dashboard.py --snapshot latest --workers 8 --plotlyjs shared
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from html import escape
+
+import numpy as np
+from plotly.offline import get_plotlyjs
+
+from charts import gauge_figure, line_figure, portfolio_pie_figure
+from dashboard import (
+    dashboard_dates, kpi_cards, metric_row, month_position, present_score, score_change,
+    summary_columns_for_date, summary_display_frame, summary_table_parts, summary_table_styler,
+)
+from kpi_grid import kpi_grid_html
+from metrics import COMPLIANCE_COLUMNS, KPI_CARDS, LINE_CHARTS, PIE_CHARTS, YTD_METRICS, unresolved_metrics
+from preprocess_data import build_data_index, process_excel_data
+from snapshot_catalog import SNAPSHOT_DIR, latest_snapshot_meta
+from snapshot_store import load_snapshot
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+PLOTLYJS_FILE = "plotly.min.js"
+
+LEGEND_HTML = """<div class="legend">
+<span><span style="color: #90d050;">&#9679;</span> Low</span>
+<span><span style="color: #fff2cc;">&#9679;</span> Low to Moderate</span>
+<span><span style="color: #ffff00;">&#9679;</span> Moderate</span>
+<span><span style="color: #ffc001;">&#9679;</span> Moderate to High</span>
+<span><span style="color: #ff0000;">&#9679;</span> High</span>
+</div>"""
+
+PAGE_STYLE = """<style>
+body { font-family: sans-serif; background-color: #f5f5f5; margin: 2rem; color: #333; }
+a { color: #1f77b4; }
+.legend { display: flex; justify-content: space-around; background: white; border-radius: 8px; padding: 10px; margin-bottom: 1rem; }
+.legend span span { font-size: 20px; }
+.row { display: grid; gap: 1rem; margin-bottom: 1rem; }
+.panel { background-color: white; padding: 15px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }
+.panel table { border-collapse: collapse; width: 100%; }
+.panel th, .panel td { border-bottom: 1px solid #eee; padding: 6px; }
+.warning { background: #fff3cd; border-radius: 8px; padding: 10px; }
+</style>"""
+
+# Data shared by the pages of one export, set once per worker process
+_export = {}
+
+
+def page_name(date):
+    """Return the file name of a date's page"""
+    return re.sub(r"[^0-9A-Za-z_-]+", "-", str(date)).strip("-") + ".html"
+
+
+def _init_worker(df_ytd, df_summary, df_summary_present, latest_col_idx, data_index, plotlyjs):
+    """Keep the dataset of the export in the worker process"""
+    _export.update(
+        df_ytd=df_ytd, df_summary=df_summary, df_summary_present=df_summary_present,
+        latest_col_idx=latest_col_idx, data_index=data_index, plotlyjs=plotlyjs,
+    )
+
+
+def _figure_html(fig, div_id):
+    """Return the div of a figure; plotly.js is loaded once by the page"""
+    return fig.to_html(full_html=False, include_plotlyjs=False, div_id=div_id, config={"displaylogo": False})
+
+
+def _chart_sections(data_index, date):
+    """Return the HTML of the line charts of the 12 months up to a date and of the portfolio pie"""
+    position = month_position(data_index, date)
+    window = slice(max(0, position - 11), position + 1)
+    months = data_index["ytd_months"][window]
+
+    lines = []
+    for key in LINE_CHARTS:
+        try:
+            values = data_index["ytd_matrix"][metric_row(data_index, key), window]
+            lines.append(_figure_html(line_figure(YTD_METRICS[key]["title"], months, values, "grid"), f"line-{key}"))
+        except Exception:
+            lines.append(f"<p>Unable to load data for {escape(YTD_METRICS[key]['title'])}</p>")
+
+    try:
+        latest_values = data_index["ytd_matrix"][:, position]
+        values = np.nan_to_num(latest_values[[metric_row(data_index, key) for key in PIE_CHARTS]]).tolist()
+        pie = _figure_html(portfolio_pie_figure([YTD_METRICS[key]["title"] for key in PIE_CHARTS], values), "pie-portfolio")
+    except Exception as e:
+        pie = f"<p>Unable to load pie chart data: {escape(str(e))}</p>"
+
+    return (
+        "<div class='row' style='grid-template-columns: 1fr 1fr;'>"
+        f"<div class='panel'><div class='row' style='grid-template-columns: 1fr 1fr;'>{''.join(lines)}</div></div>"
+        f"<div class='panel'>{pie}</div></div>"
+    )
+
+
+def render_page(date, dates):
+    """Render the dashboard of one date as a complete HTML document"""
+    data_index = _export["data_index"]
+    df_summary = _export["df_summary"]
+
+    col_position = _export["df_ytd"].columns.get_loc(date)
+    latest_col_idx, prev_col_idx = summary_columns_for_date(
+        data_index, df_summary, date, col_position, _export["latest_col_idx"]
+    )
+    df_summary_display, summary_band_cols = summary_display_frame(
+        df_summary, _export["df_summary_present"], latest_col_idx, prev_col_idx
+    )
+
+    if df_summary_display is not None:
+        table = summary_table_styler(*summary_table_parts(data_index, df_summary_display, summary_band_cols)).hide(axis="index").to_html()
+    else:
+        table = "<p>No data available.</p>"
+    composite_score = present_score(data_index, df_summary_display)
+    composite_change = score_change(data_index, latest_col_idx) if summary_band_cols is not None else ""
+    score_text = "-" if composite_score is None else f"{composite_score:.2f}"
+    missing_parameters = unresolved_metrics(data_index)
+    warning = (
+        f"<p class='warning'>Not found in the workbook, shown as '-': {escape(', '.join(missing_parameters))}</p>"
+        if missing_parameters else ""
+    )
+
+    navigation = " | ".join(
+        f"<strong>{escape(str(other))}</strong>" if other == date else f"<a href='{page_name(other)}'>{escape(str(other))}</a>"
+        for other in dates
+    )
+    if _export["plotlyjs"] is None:
+        script = f"<script src='{PLOTLYJS_FILE}'></script>"
+    else:
+        script = f"<script type='text/javascript'>{_export['plotlyjs']}</script>"
+
+    body = [
+        f"<h1>Risk Management Dashboard &ndash; {escape(str(date))}</h1>",
+        f"<p><a href='index.html'>All months</a> | {navigation}</p>",
+        warning,
+        LEGEND_HTML,
+        "<div class='row' style='grid-template-columns: 3fr 2fr;'>",
+        f"<div class='panel'>{table}</div>",
+        "<div class='panel'>"
+        f"<p style='text-align: center;'><strong>Average Risk</strong><br>Composite Score in {escape(str(date))} is {score_text}{composite_change}</p>"
+        f"{_figure_html(gauge_figure(composite_score), 'gauge')}</div>",
+        "</div>",
+        kpi_grid_html([[card] for card in kpi_cards(KPI_CARDS, data_index, date, missing="-")], widths=[1, 1, 1, 1, 1, 1, 1.5]),
+        _chart_sections(data_index, date),
+        kpi_grid_html([kpi_cards(keys, data_index, date, missing="0") for keys in COMPLIANCE_COLUMNS]),
+    ]
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Risk Management Dashboard - {escape(str(date))}</title>"
+        f"{PAGE_STYLE}{script}</head><body>{''.join(body)}</body></html>"
+    )
+
+
+def export_page(date, dates, output):
+    """Write the page of one date and return a report record"""
+    started = time.perf_counter()
+    record = {"date": str(date), "path": os.path.join(output, page_name(date)), "success": False, "message": ""}
+    try:
+        with open(record["path"], "w", encoding="utf-8") as f:
+            f.write(render_page(date, dates))
+        record["success"] = True
+    except Exception as e:
+        record["message"] = f"Error exporting {date}: {str(e)}"
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def write_index(dates, output):
+    """Write index.html linking the page of every date"""
+    links = "".join(f"<li><a href='{page_name(date)}'>{escape(str(date))}</a></li>" for date in reversed(dates))
+    with open(os.path.join(output, "index.html"), "w", encoding="utf-8") as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Risk Management Dashboard</title>{PAGE_STYLE}</head>"
+                f"<body><h1>Risk Management Dashboard</h1><ul>{links}</ul></body></html>")
+
+
+def run_export(result, output, workers=None, plotlyjs="inline", dates=None):
+    """Export the pages of a processed result on a process pool and yield report records as they finish"""
+    df_ytd, df_summary, df_summary_present, latest_col_idx, latest_col_ytd_idx = result[:5]
+    all_dates = dashboard_dates(df_ytd, latest_col_ytd_idx)
+    dates = [date for date in all_dates if date in dates] if dates else all_dates
+
+    os.makedirs(output, exist_ok=True)
+    write_index(dates, output)
+    if plotlyjs == "shared":
+        with open(os.path.join(output, PLOTLYJS_FILE), "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+        script = None
+    else:
+        script = get_plotlyjs()
+
+    # The index of the dataset is built once here and inherited by the forked workers
+    data_index = build_data_index(df_ytd, df_summary)
+    initargs = (df_ytd, df_summary, df_summary_present, latest_col_idx, data_index, script)
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=initargs) as executor:
+        futures = [executor.submit(export_page, date, dates, output) for date in dates]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def load_result(args):
+    """Return the processed result of the workbook or snapshot given on the command line"""
+    if args.workbook:
+        return process_excel_data(args.workbook)
+    snapshot_id = args.snapshot
+    if snapshot_id == "latest":
+        meta = latest_snapshot_meta(args.store)
+        if meta is None:
+            return None, None, None, None, None, False, f"No snapshot found in {args.store or SNAPSHOT_DIR}"
+        snapshot_id = meta["snapshot_id"]
+    return load_snapshot(snapshot_id, args.store)
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Export the dashboard of every month to static HTML files.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--workbook", help="Data_YTD/Summary workbook to process and export")
+    source.add_argument("--snapshot", default="latest", help="snapshot id to export (default: latest)")
+    parser.add_argument("--store", help=f"snapshot directory (default: {SNAPSHOT_DIR})")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"output directory (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--dates", nargs="+", help="only export these dates (e.g. Jan-2024)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--plotlyjs", choices=["inline", "shared"], default="inline",
+                        help="embed plotly.js in every page, or write it once next to the pages (default: inline)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = load_result(args)
+    if not result[5]:
+        print(result[6], file=sys.stderr)
+        return 1
+
+    print(f"Exporting with {args.workers} worker(s) into {args.output}")
+    records = []
+    for record in run_export(result, args.output, args.workers, args.plotlyjs, args.dates):
+        records.append(record)
+        status = "ok" if record["success"] else "FAIL"
+        detail = os.path.relpath(record["path"]) if record["success"] else record["message"]
+        print(f"[{status:>4}] {record['seconds']:8.2f}s  {record['date']:<10} {detail}")
+
+    failures = [record for record in records if not record["success"]]
+    print(f"Done in {time.perf_counter() - started:.2f}s: {len(records) - len(failures)} page(s) written, {len(failures)} failed")
+    return 1 if failures or not records else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import io
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from data_cache import store_result
+from profiling import record_span
+from preprocess_data import PROGRESS_STAGES, process_excel_data, process_excel_update
+
+# Worker processes shared by every session; parsing there keeps the server's GIL free
+INGEST_WORKERS = 2
+
+# A finished job waits this long for its session to collect the result before it is dropped
+FINISHED_JOB_TTL_SECONDS = 10 * 60
+
+_executor = None
+_progress_queue = None
+_jobs = {}  # file_hash (or update_fingerprint of an incremental upload) -> job dict
+_jobs_lock = threading.Lock()
+
+# Set inside worker processes by _init_worker
+_worker_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    """Worker initializer: keep the queue used to report progress stages"""
+    global _worker_progress_queue
+    _worker_progress_queue = progress_queue
+
+
+def _run_ingest(file_hash, file_bytes, base):
+    """Worker entry point: process a workbook, reporting each stage it reaches"""
+    def progress(stage):
+        _worker_progress_queue.put((file_hash, stage))
+
+    if base is not None:
+        return process_excel_update(io.BytesIO(file_bytes), *base, progress=progress)
+    return process_excel_data(io.BytesIO(file_bytes), progress=progress)
+
+
+def _get_executor():
+    """Start the worker pool on first use"""
+    global _executor, _progress_queue
+    if _executor is None:
+        # Forking the multi-threaded server could copy a lock another thread holds into
+        # the worker, so workers come from a fork server where the platform has one,
+        # preloaded with this module. Workers still import the app script as
+        # __mp_main__ on start-up; main.py keeps its page code under its __main__ guard.
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+        else:
+            context = multiprocessing.get_context("spawn")
+        _progress_queue = context.Queue()
+        _executor = ProcessPoolExecutor(
+            max_workers=INGEST_WORKERS, mp_context=context,
+            initializer=_init_worker, initargs=(_progress_queue,),
+        )
+    return _executor
+
+
+def _drain_progress_locked():
+    """Move reported stages from the worker queue onto their jobs"""
+    if _progress_queue is None:
+        return
+    while True:
+        try:
+            file_hash, stage = _progress_queue.get_nowait()
+        except queue.Empty:
+            return
+        job = _jobs.get(file_hash)
+        if job is not None:
+            job["stages"].append(stage)
+
+
+def _prune_finished_locked(now):
+    """Drop finished jobs no session has collected within FINISHED_JOB_TTL_SECONDS"""
+    for file_hash in [key for key, job in _jobs.items()
+                      if "result" in job and now - job["finished_at"] > FINISHED_JOB_TTL_SECONDS]:
+        del _jobs[file_hash]
+
+
+def _finish_job(file_hash, job, future):
+    """Done callback of a job: cache and snapshot a successful result, then keep it for its session
+
+    It runs when the worker finishes, whether or not a session is still polling, so
+    results of abandoned uploads still reach the parse cache and the snapshot store.
+    """
+    global _executor
+    record_span("ingest.process_workbook", time.time() - job["started_at"], **job["fields"])
+    try:
+        result = future.result()
+    except BrokenProcessPool as e:
+        # A crashed worker breaks the whole pool; start a fresh one for the next upload
+        with _jobs_lock:
+            if _executor is job["executor"]:
+                _executor = None
+        result = (None, None, None, None, None, False, f"Error processing file: {str(e)}")
+    except Exception as e:
+        result = (None, None, None, None, None, False, f"Error processing file: {str(e)}")
+
+    if result[5]:
+        store_result(file_hash, result)
+    with _jobs_lock:
+        _drain_progress_locked()
+        # The parse cache may skip or expire the result, so the job holds it until collect_job
+        job["finished_at"] = time.time()
+        job["result"] = result
+
+
+def submit_ingest(file_bytes, file_hash, base=None):
+    """Start processing a workbook in a worker process, or return the job already running for it
+
+    A job that failed is replaced, so uploading the same bytes again retries them.
+    """
+    global _executor
+    with _jobs_lock:
+        _prune_finished_locked(time.time())
+        job = _jobs.get(file_hash)
+        if job is not None and not (job_done(job) and not job["result"][5]):
+            return job
+
+        job = {
+            "file_hash": file_hash,
+            "stages": [],
+            "started_at": time.time(),
+            # Worker time of process_excel_data / process_excel_update, including the wait for a free worker
+            "fields": {"incremental": base is not None, "bytes": len(file_bytes)},
+            "executor": _get_executor(),
+        }
+        try:
+            job["future"] = job["executor"].submit(_run_ingest, file_hash, file_bytes, base)
+        except BrokenProcessPool:
+            # The pool broke while no job was running, so no callback replaced it
+            _executor = None
+            job["executor"] = _get_executor()
+            job["future"] = job["executor"].submit(_run_ingest, file_hash, file_bytes, base)
+        _jobs[file_hash] = job
+    # Registered outside the lock: a job that is already finished runs the callback right here
+    job["future"].add_done_callback(lambda future: _finish_job(file_hash, job, future))
+    return job
+
+
+def get_job(file_hash):
+    """Return the job processing a file hash, or None"""
+    with _jobs_lock:
+        _prune_finished_locked(time.time())
+        return _jobs.get(file_hash)
+
+
+def job_done(job):
+    """Return True once the job's result or error has been recorded"""
+    return "result" in job
+
+
+def job_progress(job):
+    """Return the stages reached so far and the fraction of PROGRESS_STAGES they cover"""
+    with _jobs_lock:
+        _drain_progress_locked()
+        stages = list(job["stages"])
+    return stages, min(len(stages) / len(PROGRESS_STAGES), 1.0)
+
+
+def collect_job(job):
+    """Return the result of a finished job and forget the job"""
+    with _jobs_lock:
+        if _jobs.get(job["file_hash"]) is job:
+            del _jobs[job["file_hash"]]
+    return job["result"]
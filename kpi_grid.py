@@ -0,0 +1,61 @@
+from html import escape
+
+import streamlit as st
+
+# Card look of the former st.container(border=True) cards
+CARD_STYLE = "border: 1px solid rgba(49, 51, 63, 0.2); border-radius: 0.5rem; padding: 0.75rem 0.5rem;"
+TITLE_STYLE = "text-align: center; color: #999; font-size: 12px;"
+SUBTITLE_STYLE = "text-align: center; color: #666; font-size: 11px; margin-top: 5px;"
+CHANGE_STYLE = "text-align: center; font-size: 11px;"
+
+# Colour of a change label by the sign of the change
+CHANGE_COLORS = {1: "#2e7d32", -1: "#c62828", 0: "#999"}
+
+# Value style per card format: "value" (rb/jt/miliar), "percentage" or "count"
+VALUE_STYLES = {
+    "value": "text-align: center; font-size: 24px; font-weight: bold; color: #333; margin: 5px 0;",
+    "percentage": "text-align: center; font-size: 32px; font-weight: bold; color: #ff6347; margin: 5px 0;",
+    "count": "text-align: center; font-size: 20px; font-weight: bold; color: #333; margin: 5px 0;",
+}
+
+
+def kpi_card_html(card):
+    """Return the HTML of one card record
+
+    A record has a title, value and format, and optionally a subtitle, a list of
+    changes ({"text", "direction"}) shown under the value and a hover tooltip.
+    """
+    tooltip = f" title='{escape(str(card['tooltip']))}'" if card.get("tooltip") else ""
+    parts = [
+        f"<div style='{CARD_STYLE}'{tooltip}>",
+        f"<div style='{TITLE_STYLE}'>{escape(str(card['title']))}</div>",
+        f"<div style='{VALUE_STYLES[card.get('format', 'value')]}'>{escape(str(card['value']))}</div>",
+    ]
+    if card.get("changes"):
+        changes = " &middot; ".join(
+            f"<span style='color: {CHANGE_COLORS[change['direction']]};'>{escape(change['text'])}</span>"
+            for change in card["changes"]
+        )
+        parts.append(f"<div style='{CHANGE_STYLE}'>{changes}</div>")
+    if card.get("subtitle"):
+        parts.append(f"<div style='{SUBTITLE_STYLE}'>{escape(str(card['subtitle']))}</div>")
+    parts.append("</div>")
+    return "".join(parts)
+
+
+def kpi_grid_html(columns, widths=None):
+    """Return the HTML of a grid with one stack of cards per column"""
+    widths = widths or [1] * len(columns)
+    template = " ".join(f"{width}fr" for width in widths)
+    stacks = "".join(
+        "<div style='display: flex; flex-direction: column; gap: 1rem;'>"
+        + "".join(kpi_card_html(card) for card in cards)
+        + "</div>"
+        for cards in columns
+    )
+    return f"<div style='display: grid; grid-template-columns: {template}; gap: 1rem; margin-bottom: 1rem;'>{stacks}</div>"
+
+
+def render_kpi_grid(columns, widths=None):
+    """Render a whole grid of KPI cards as a single element"""
+    st.markdown(kpi_grid_html(columns, widths), unsafe_allow_html=True)
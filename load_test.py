@@ -0,0 +1,552 @@
+"""Load test the app with concurrent simulated sessions on a local Streamlit server.
+
+For every session count a fresh `streamlit run main.py` server is started and that
+many websocket clients go through the real flow at the same time: the home menu,
+uploading a synthetic workbook, the dashboard, then the latest dates of the date
+selector and every line and pie chart tab. Each client speaks the browser's
+protocol: it sends the widget states of an interaction, waits for the rerun to
+finish and repeats the run_every reruns of fragments while its upload is parsed.
+
+Reported per session count: p50/p99 latency of the interactive reruns (the upload,
+which waits for an ingest worker, is reported on its own), the CPU used by the
+server process and its ingest workers, and their memory. Memory per session is
+reported twice: as the growth of the server process's resident set, and as the
+growth of the proportional set size (PSS) of the server with its workers, which
+splits the pages forked workers share with the server instead of counting them in
+every process. The worker pool starts with the first upload, so its PSS, a mostly
+fixed cost, is also reported on its own. CPU and memory are read from /proc, so the harness runs on Linux only.
+
+Example:
+    python load_test.py --sessions 1 5 10 20
+    python load_test.py --sessions 10 --size 60x500 --same-workbook --think 1.0
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+import requests
+import streamlit
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+from benchmark_ingest import RESULTS_DIR, WORKBOOK_DIR, parse_size
+from synthetic_workbook import write_workbook
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+DEFAULT_SESSIONS = [1, 5, 10]
+DEFAULT_SIZE = "24x150"
+
+SERVER_START_TIMEOUT = 60
+RERUN_TIMEOUT = 120
+UPLOAD_TIMEOUT = 600
+SAMPLE_INTERVAL = 0.25
+
+# Labels of the widgets the simulated analysts use
+UPLOAD_BUTTON = "📤 Update Data"
+DASHBOARD_BUTTON = "📊 View Dashboard"
+CONFIRM_BUTTON = "✅ Confirm and View Dashboard"
+DATE_SELECTBOX = "Select Date"
+
+# The upload waits for a worker process, so it is kept out of the rerun percentiles
+UPLOAD_STEP = "upload"
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _free_port():
+    """Return a TCP port nobody listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, snapshot_dir, log_path):
+    """Start the app on a local port with its own snapshot store and wait until it is healthy"""
+    env = dict(os.environ, RISK_SNAPSHOT_DIR=snapshot_dir)
+    command = [
+        sys.executable, "-m", "streamlit", "run", APP_PATH,
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--server.address", "127.0.0.1",
+        "--server.fileWatcherType", "none",
+        # The harness uploads without the browser's XSRF cookie
+        "--server.enableXsrfProtection", "false",
+        "--browser.gatherUsageStats", "false",
+    ]
+    with open(log_path, "w", encoding="utf-8") as log:
+        server = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}; see {log_path}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).ok:
+                return server
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError(f"Server did not become healthy within {SERVER_START_TIMEOUT}s; see {log_path}")
+
+
+def stop_server(server):
+    """Stop a server started by start_server"""
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def _process_tree(pid):
+    """Return a process id and the ids of all its live descendants"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                # The command name in parentheses may contain spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def _proportional_bytes(pid, resident_bytes):
+    """Return the PSS of a process: its private pages plus its share of the pages it shares
+
+    Kernels without /proc/<pid>/smaps_rollup (before 4.14) fall back to the resident size.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resident_bytes
+
+
+def _process_usage(pid):
+    """Return the CPU seconds, resident bytes and PSS of one process, or zeros once it has exited"""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return 0.0, 0, 0
+    # utime and stime are the 14th and 15th fields of /proc/<pid>/stat
+    cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return cpu_seconds, resident_pages * PAGE_SIZE, _proportional_bytes(pid, resident_pages * PAGE_SIZE)
+
+
+def server_usage(pid):
+    """Return the CPU seconds used, the server's resident bytes and the PSS of the server and of its workers"""
+    usage = {"cpu_seconds": 0.0, "server_rss": 0, "server_pss": 0, "worker_pss": 0}
+    for process_id in _process_tree(pid):
+        seconds, rss, pss = _process_usage(process_id)
+        usage["cpu_seconds"] += seconds
+        if process_id == pid:
+            usage["server_rss"], usage["server_pss"] = rss, pss
+        else:
+            usage["worker_pss"] += pss
+    usage["total_pss"] = usage["server_pss"] + usage["worker_pss"]
+    return usage
+
+
+def sample_usage(pid, stop, peaks):
+    """Record the peak memory of a server and its workers until `stop` is set"""
+    while not stop.is_set():
+        usage = server_usage(pid)
+        for key in ("server_rss", "worker_pss", "total_pss"):
+            peaks[key] = max(peaks.get(key, 0), usage[key])
+        stop.wait(SAMPLE_INTERVAL)
+
+
+def open_session(websocket):
+    """Return the client-side state of one simulated browser tab"""
+    return {
+        "ws": websocket,
+        "session_id": None,
+        "page_script_hash": "",
+        "widgets": {},  # widget id -> {"type", "label", "options", "fragment_id"}
+        "tabs": {},  # delta path of a tab container -> {"id", "labels", "fragment_id"}
+        "states": {},  # widget id -> WidgetState sent with every rerun
+        "auto_reruns": {},  # fragment id -> interval in seconds
+        "fragment_run": False,  # whether the current run only reruns fragments
+        "latencies": [],  # (step, seconds)
+        "errors": [],
+    }
+
+
+def _record_delta(session, msg):
+    """Keep the widgets and tab containers a delta adds, and the errors it shows"""
+    delta = msg.delta
+    path = tuple(msg.metadata.delta_path)
+    if delta.WhichOneof("type") == "new_element":
+        kind = delta.new_element.WhichOneof("type")
+        element = getattr(delta.new_element, kind)
+        if kind == "exception":
+            session["errors"].append(f"{element.type}: {element.message}")
+        elif getattr(element, "id", ""):
+            session["widgets"][element.id] = {
+                "type": kind,
+                "label": getattr(element, "label", ""),
+                "options": list(getattr(element, "options", [])),
+                "fragment_id": delta.fragment_id,
+            }
+    elif delta.WhichOneof("type") == "add_block":
+        block = delta.add_block
+        kind = block.WhichOneof("type")
+        if kind == "tab_container" and block.tab_container.id:
+            session["tabs"][path] = {"id": block.tab_container.id, "labels": [], "fragment_id": delta.fragment_id}
+        elif kind == "tab" and path[:-1] in session["tabs"]:
+            session["tabs"][path[:-1]]["labels"].append(block.tab.label)
+
+
+def _receive(session, timeout):
+    """Read and apply one message from the server"""
+    msg = ForwardMsg()
+    msg.ParseFromString(session["ws"].recv(timeout=timeout))
+    kind = msg.WhichOneof("type")
+    if kind == "new_session":
+        session["session_id"] = msg.new_session.initialize.session_id or session["session_id"]
+        session["page_script_hash"] = msg.new_session.page_script_hash
+        session["fragment_run"] = bool(msg.new_session.fragment_ids_this_run)
+        if not session["fragment_run"]:
+            # A full run redraws the page, so the browser forgets the widgets it had
+            session["widgets"].clear()
+            session["tabs"].clear()
+            session["auto_reruns"].clear()
+    elif kind == "delta":
+        _record_delta(session, msg)
+    elif kind == "auto_rerun":
+        session["auto_reruns"][msg.auto_rerun.fragment_id] = msg.auto_rerun.interval
+    return msg
+
+
+def _send_rerun(session, triggers=(), fragment_id="", auto_rerun=False):
+    """Ask the server to rerun the app or one fragment with the current widget states"""
+    msg = BackMsg()
+    msg.rerun_script.page_script_hash = session["page_script_hash"]
+    msg.rerun_script.fragment_id = fragment_id
+    msg.rerun_script.is_auto_rerun = auto_rerun
+    msg.rerun_script.widget_states.widgets.extend(session["states"].values())
+    for widget_id in triggers:
+        msg.rerun_script.widget_states.widgets.add(id=widget_id, trigger_value=True)
+    session["ws"].send(msg.SerializeToString())
+
+
+def _wait_finished(session, timeout=RERUN_TIMEOUT):
+    """Read messages until a run finishes without the app asking for another one"""
+    deadline = time.monotonic() + timeout
+    while True:
+        msg = _receive(session, max(0.0, deadline - time.monotonic()))
+        if msg.WhichOneof("type") == "script_finished" and msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+            if msg.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                raise RuntimeError("The app failed to compile")
+            if not session["fragment_run"]:
+                # Value states of widgets that are no longer drawn are dropped, like the browser does
+                for widget_id in [wid for wid in session["states"] if wid not in session["widgets"]]:
+                    del session["states"][widget_id]
+            return
+
+
+def interact(session, step, triggers=(), fragment_id=""):
+    """Send one interaction and record how long its rerun took"""
+    started = time.perf_counter()
+    _send_rerun(session, triggers, fragment_id)
+    _wait_finished(session)
+    session["latencies"].append((step, time.perf_counter() - started))
+
+
+def find_widget(session, kind, label=None):
+    """Return the id and description of a drawn widget of a type, and label if given"""
+    for widget_id, widget in session["widgets"].items():
+        if widget["type"] == kind and label in (None, widget["label"]):
+            return widget_id, widget
+    raise LookupError(f"No {kind} labelled {label!r} on the page" if label else f"No {kind} on the page")
+
+
+def _request_file_urls(session, file_name):
+    """Ask the server where to upload a file, like the browser's file uploader does"""
+    request_id = uuid.uuid4().hex
+    msg = BackMsg()
+    msg.file_urls_request.request_id = request_id
+    msg.file_urls_request.file_names.append(file_name)
+    msg.file_urls_request.session_id = session["session_id"]
+    session["ws"].send(msg.SerializeToString())
+
+    deadline = time.monotonic() + RERUN_TIMEOUT
+    while True:
+        reply = _receive(session, max(0.0, deadline - time.monotonic()))
+        if reply.WhichOneof("type") == "file_urls_response" and reply.file_urls_response.response_id == request_id:
+            if reply.file_urls_response.error_msg:
+                raise RuntimeError(reply.file_urls_response.error_msg)
+            return reply.file_urls_response.file_urls[0]
+
+
+def upload_workbook(session, base_url, path):
+    """Upload a workbook and follow the page until the dashboard is shown
+
+    A workbook parsed in the background leads to the dashboard by itself after the
+    page's progress reruns; one already parsed shows a preview to confirm first.
+    """
+    uploader_id, _ = find_widget(session, "file_uploader")
+    with open(path, "rb") as f:
+        file_bytes = f.read()
+    name = os.path.basename(path)
+
+    started = time.perf_counter()
+    file_urls = _request_file_urls(session, name)
+    response = requests.put(
+        base_url + file_urls.upload_url,
+        files={"file": (name, file_bytes, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        timeout=RERUN_TIMEOUT,
+    )
+    response.raise_for_status()
+
+    state = WidgetState(id=uploader_id)
+    info = state.file_uploader_state_value.uploaded_file_info.add()
+    info.name, info.size, info.file_id = name, len(file_bytes), file_urls.file_id
+    info.file_urls.CopyFrom(file_urls)
+    session["states"][uploader_id] = state
+    _send_rerun(session)
+    _wait_finished(session)
+
+    deadline = time.monotonic() + UPLOAD_TIMEOUT
+    while not any(w["label"] == DATE_SELECTBOX for w in session["widgets"].values()):
+        if session["errors"]:
+            raise RuntimeError("The upload page showed an exception")
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"The upload did not lead to the dashboard within {UPLOAD_TIMEOUT}s")
+        confirm = [wid for wid, w in session["widgets"].items() if w["label"] == CONFIRM_BUTTON]
+        if confirm:
+            _send_rerun(session, triggers=confirm)
+        elif session["auto_reruns"]:
+            # While the workbook is parsed the page polls with a run_every fragment
+            fragment_id, interval = next(iter(session["auto_reruns"].items()))
+            time.sleep(interval)
+            _send_rerun(session, fragment_id=fragment_id, auto_rerun=True)
+        else:
+            raise RuntimeError("The upload did not lead to the dashboard")
+        _wait_finished(session)
+    session["latencies"].append((UPLOAD_STEP, time.perf_counter() - started))
+
+
+def _choose(session, widget_id, value):
+    """Set the value a selectbox or tab container will send"""
+    session["states"][widget_id] = WidgetState(id=widget_id, string_value=value)
+
+
+def run_session(base_url, workbook, dates, think, session_results):
+    """Walk one simulated analyst through menu, upload, dashboard, dates and tabs"""
+    ws_url = base_url.replace("http://", "ws://") + "/_stcore/stream"
+    session = None
+    try:
+        with connect(ws_url, subprotocols=["streamlit"], max_size=None, open_timeout=RERUN_TIMEOUT) as websocket:
+            session = open_session(websocket)
+            interact(session, "menu")
+            time.sleep(think)
+
+            upload_button, _ = find_widget(session, "button", UPLOAD_BUTTON)
+            interact(session, "upload_page", triggers=[upload_button])
+            time.sleep(think)
+
+            upload_workbook(session, base_url, workbook)
+            time.sleep(think)
+
+            dashboard_button, _ = find_widget(session, "button", DASHBOARD_BUTTON)
+            interact(session, "dashboard", triggers=[dashboard_button])
+            time.sleep(think)
+
+            date_id, date_box = find_widget(session, "selectbox", DATE_SELECTBOX)
+            # From the oldest of the latest dates up to the latest one again
+            for date in date_box["options"][-dates:]:
+                _choose(session, date_id, date)
+                interact(session, "date", fragment_id=date_box["fragment_id"])
+                time.sleep(think)
+
+            for container in list(session["tabs"].values()):
+                # Every tab in turn, ending back on the first
+                for label in container["labels"][1:] + container["labels"][:1]:
+                    _choose(session, container["id"], label)
+                    interact(session, "tab", fragment_id=container["fragment_id"])
+                    time.sleep(think)
+    except Exception as e:
+        if session is None:
+            session = open_session(None)
+        session["errors"].append(f"{type(e).__name__}: {e}")
+    session_results.append({"latencies": session["latencies"], "errors": session["errors"]})
+
+
+def _percentiles_ms(seconds):
+    """Return the count, p50 and p99 of durations in milliseconds"""
+    if not seconds:
+        return {"count": 0, "p50_ms": None, "p99_ms": None}
+    p50, p99 = np.percentile(seconds, [50, 99]) * 1000
+    return {"count": len(seconds), "p50_ms": round(p50, 1), "p99_ms": round(p99, 1)}
+
+
+def run_level(count, workbooks, args):
+    """Run `count` concurrent sessions against a fresh server and return the measurements"""
+    work_dir = tempfile.mkdtemp(prefix="load-test-")
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, os.path.join(work_dir, "snapshots"), os.path.join(work_dir, "server.log"))
+    try:
+        baseline = server_usage(server.pid)
+        peaks, stop = {}, threading.Event()
+        sampler = threading.Thread(target=sample_usage, args=(server.pid, stop, peaks), daemon=True)
+        sampler.start()
+
+        session_results = []
+        threads = [
+            threading.Thread(target=run_session,
+                             args=(base_url, workbooks[i % len(workbooks)], args.dates, args.think, session_results))
+            for i in range(count)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+            if args.ramp:
+                time.sleep(args.ramp / count)
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - started
+
+        usage = server_usage(server.pid)
+        stop.set()
+        sampler.join()
+    finally:
+        stop_server(server)
+        if args.keep_logs:
+            print(f"Server log kept in {os.path.join(work_dir, 'server.log')}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    latencies = [latency for result in session_results for latency in result["latencies"]]
+    steps = sorted({step for step, _ in latencies})
+    cpu_seconds = usage["cpu_seconds"] - baseline["cpu_seconds"]
+    peak = {key: max(peaks.get(key, 0), usage[key]) for key in ("server_rss", "worker_pss", "total_pss")}
+    return {
+        "sessions": count,
+        "wall_seconds": round(wall_seconds, 2),
+        "reruns": _percentiles_ms([seconds for step, seconds in latencies if step != UPLOAD_STEP]),
+        "steps": {step: _percentiles_ms([s for name, s in latencies if name == step]) for step in steps},
+        "cpu_seconds": round(cpu_seconds, 2),
+        "cpu_cores": round(cpu_seconds / wall_seconds, 2) if wall_seconds else None,
+        "baseline_server_rss_mb": round(baseline["server_rss"] / 2**20, 1),
+        "server_rss_peak_mb": round(peak["server_rss"] / 2**20, 1),
+        "server_rss_per_session_mb": round((peak["server_rss"] - baseline["server_rss"]) / 2**20 / count, 1),
+        "baseline_pss_mb": round(baseline["total_pss"] / 2**20, 1),
+        "worker_pss_peak_mb": round(peak["worker_pss"] / 2**20, 1),
+        "total_pss_peak_mb": round(peak["total_pss"] / 2**20, 1),
+        "pss_per_session_mb": round((peak["total_pss"] - baseline["total_pss"]) / 2**20 / count, 1),
+        "failed_sessions": sum(1 for result in session_results if result["errors"]),
+        "errors": [error for result in session_results for error in result["errors"]],
+    }
+
+
+def workbook_paths(months, parameters, count, workbook_dir):
+    """Return the synthetic workbooks to upload, one seed per entry, generating them on first use"""
+    os.makedirs(workbook_dir, exist_ok=True)
+    paths = []
+    for seed in range(count):
+        path = os.path.join(workbook_dir, f"synthetic-{months}x{parameters}-seed{seed}.xlsx")
+        if not os.path.exists(path):
+            write_workbook(path, months=months, parameters=parameters, seed=seed)
+        paths.append(path)
+    return paths
+
+
+def _environment():
+    """Describe the interpreter, Streamlit and source revision under test"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(APP_PATH), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "python": sys.version.split()[0],
+        "streamlit": streamlit.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Load test the app with concurrent simulated sessions.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=DEFAULT_SESSIONS,
+                        help=f"concurrent session counts, one fresh server each (default: {' '.join(map(str, DEFAULT_SESSIONS))})")
+    parser.add_argument("--size", default=DEFAULT_SIZE, help=f"<months>x<parameters> of the uploaded workbooks (default: {DEFAULT_SIZE})")
+    parser.add_argument("--same-workbook", action="store_true",
+                        help="every session uploads the same workbook (default: one workbook per session)")
+    parser.add_argument("--dates", type=int, default=6, help="latest dates each session switches through (default: 6)")
+    parser.add_argument("--think", type=float, default=0.5, help="seconds between interactions (default: 0.5)")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds over which sessions are started (default: 0)")
+    parser.add_argument("--workbooks", default=WORKBOOK_DIR, help=f"generated workbook cache (default: {WORKBOOK_DIR})")
+    parser.add_argument("--output", help="results JSON path (default: benchmark_results/load-<time>.json)")
+    parser.add_argument("--keep-logs", action="store_true", help="keep the server log of every level")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir("/proc"):
+        print("The load test reads server CPU and memory from /proc and needs Linux", file=sys.stderr)
+        return 1
+
+    months, parameters = parse_size(args.size)
+    workbooks = workbook_paths(months, parameters, 1 if args.same_workbook else max(args.sessions), args.workbooks)
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{time.strftime('%Y%m%dT%H%M%S')}.json")
+    results = {
+        "created_at": time.time(), "environment": _environment(), "size": args.size,
+        "same_workbook": args.same_workbook, "dates": args.dates, "think_seconds": args.think, "levels": [],
+    }
+
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p99 ms':>8} {'upload p50':>11}"
+          f" {'CPU cores':>9} {'peak PSS MiB':>12} {'worker PSS':>10} {'PSS/session':>11} {'RSS/session':>11} {'failed':>6}")
+    for count in args.sessions:
+        level = run_level(count, workbooks, args)
+        results["levels"].append(level)
+        upload = level["steps"].get(UPLOAD_STEP, {}).get("p50_ms")
+        print(f"{count:>8} {level['reruns']['count']:>7} {level['reruns']['p50_ms'] or 0:>8.1f} {level['reruns']['p99_ms'] or 0:>8.1f}"
+              f" {(upload or 0) / 1000:>10.2f}s {level['cpu_cores'] or 0:>9.2f} {level['total_pss_peak_mb']:>12.1f}"
+              f" {level['worker_pss_peak_mb']:>10.1f} {level['pss_per_session_mb']:>11.1f}"
+              f" {level['server_rss_per_session_mb']:>11.1f} {level['failed_sessions']:>6}")
+        for error in level["errors"][:5]:
+            print(f"{'':>10}{error}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {output}")
+    return 1 if any(level["failed_sessions"] for level in results["levels"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,140 +1,49 @@
+import time
 import streamlit as st
-from show_upload_data import show_data_upload
-from dashboard import show_dashboard
-
-# Page configuration
-st.set_page_config(page_title="Risk Management Dashboard", layout="wide")
-
-# Custom CSS
-st.markdown("""
-<style>
-    .main {
-        background-color: #f5f5f5;
-    }
-    .block-container {
-        padding-top: 2rem;
-        padding-bottom: 0rem;
-        max-width: 100%;
-    }
-    header {
-        visibility: visible !important;
-    }
-    .main > div {
-        padding-top: 2rem;
-    }
-    .stMetric {
-        background-color: white;
-        padding: 10px;
-        border-radius: 8px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .risk-table {
-        background-color: white;
-        padding: 15px;
-        border-radius: 8px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-    }
-    .summary-box {
-        background-color: #e8e8e8;
-        padding: 15px;
-        border-radius: 8px;
-        margin-bottom: 15px;
-    }
-    .survey-card {
-        background-color: white;
-        padding: 8px;
-        border-radius: 6px;
-        text-align: center;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        margin-bottom: 8px;
-    }
-    .grc-card {
-        background-color: white;
-        padding: 8px;
-        border-radius: 6px;
-        text-align: center;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        margin-bottom: 8px;
-    }
-    .grc-number {
-        font-size: 32px;
-        color: #ff6347;
-        font-weight: bold;
-        margin: 5px 0;
-    }
-    .survey-number {
-        font-size: 24px;
-        font-weight: bold;
-        color: #333;
-        margin: 5px 0;
-    }
-    .survey-label {
-        color: #999;
-        font-size: 12px;
-    }
-    h1 {
-        font-size: 28px !important;
-        margin-bottom: 0.5rem !important;
-        padding: 0 !important;
-    }
-    h3 {
-        font-size: 18px !important;
-        margin: 0.5rem 0 !important;
-    }
-    h4 {
-        font-size: 14px !important;
-        margin: 0.3rem 0 !important;
-    }
-    .stButton button {
-        width: 100%;
-        height: 35px;
-        padding: 5px;
-        font-size: 13px;
-    }
-    div[data-testid="stSelectbox"] {
-        margin-bottom: 0.5rem;
-    }
-    .element-container {
-        margin-bottom: 0.3rem;
-    }
-    [data-testid="stTextArea"] textarea {
-        height: 100px !important;
-        min-height: 100px !important;
-    }
-    .nav-button {
-        background-color: #20B2AA;
-        color: white;
-        border: none;
-        padding: 10px 20px;
-        font-size: 16px;
-        border-radius: 5px;
-        cursor: pointer;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Initialize session state
-if 'page' not in st.session_state:
-    st.session_state.page = 'menu'
-if 'df_ytd' not in st.session_state:
-    st.session_state.df_ytd = None
-if 'df_summary' not in st.session_state:
-    st.session_state.df_summary = None
-if 'df_summary_present' not in st.session_state:
-    st.session_state.df_summary_present = None
-if 'uploaded_file' not in st.session_state:
-    st.session_state.uploaded_file = None
-if 'latest_col_ytd_idx' not in st.session_state:
-    st.session_state.latest_col_ytd_idx = None
-if 'latest_col_idx' not in st.session_state:
-    st.session_state.latest_col_idx = None
+from assets import APP_CSS, logo_bytes
+from profiling import debug_panel_enabled, lazy_import, record_span, show_profiling_panel, span
+from snapshot_catalog import latest_snapshot_meta
+
+# The upload and dashboard pages (and pandas, NumPy, pyarrow and plotly with them)
+# are imported by lazy_import when first visited, so the home menu renders without them
+
+# Whole-rerun timing starts before the page config and CSS
+rerun_started = time.perf_counter()
+
+# Everything that touches the page runs under the __main__ guard below: ingest
+# workers re-import this script as __mp_main__ when they start
+def setup_page():
+    """Configure the page and initialize the state of the session"""
+    # Page configuration
+    st.set_page_config(page_title="Risk Management Dashboard", layout="wide")
+
+    # Custom CSS, defined once per process in assets.py
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+
+    # Initialize session state
+    if 'page' not in st.session_state:
+        st.session_state.page = 'menu'
+    # The session's data lives in the shared dataset registry; the session only keeps its id
+    if 'dataset_id' not in st.session_state:
+        st.session_state.dataset_id = None
+
+    # Start new sessions from the latest saved snapshot so the dashboard works without an upload.
+    # Only its metadata is read here; the dataset registry loads the frames when a page needs them.
+    if 'snapshot_checked' not in st.session_state:
+        st.session_state.snapshot_checked = True
+        if st.session_state.dataset_id is None:
+            with span("main.snapshot_meta"):
+                meta = latest_snapshot_meta()
+            if meta is not None:
+                st.session_state.dataset_id = meta["source_hash"]
 
 def main():
     """Main function to control navigation"""
+    dashboard_ready = st.session_state.dataset_id is not None
 
     # Sidebar navigation
-    with st.sidebar:
-        st.image("Logo.png")
+    with st.sidebar, span("main.sidebar"):
+        st.image(logo_bytes())
 
         st.title("Navigation")
 
@@ -143,11 +52,12 @@ def main():
             st.rerun()
 
         if st.button("📤 Update Data", use_container_width=True):
+            st.session_state.pop('upload_message', None)
             st.session_state.page = 'upload'
             st.rerun()
 
         if st.button("📊 View Dashboard", use_container_width=True):
-            if st.session_state.df_ytd is not None and st.session_state.df_summary_present is not None:
+            if dashboard_ready:
                 st.session_state.page = 'dashboard'
                 st.rerun()
             else:
@@ -157,7 +67,7 @@ def main():
 
         # Data status
         st.subheader("Data Status")
-        if st.session_state.df_ytd is not None and st.session_state.df_summary is not None:
+        if dashboard_ready:
             st.success("✅ Data loaded")
         else:
             st.warning("⚠️ No data loaded")
@@ -176,17 +86,35 @@ def main():
 
         with col2:
             if st.button("📊 View Dashboard", use_container_width=True, key="menu_dashboard"):
-                if st.session_state.df_ytd is not None and st.session_state.df_summary_present is not None:
+                if dashboard_ready:
                     st.session_state.page = 'dashboard'
                     st.rerun()
                 else:
                     st.warning("Please upload data first!")
 
     elif st.session_state.page == 'upload':
-        show_data_upload()
+        lazy_import("show_upload_data").show_data_upload()
 
     elif st.session_state.page == 'dashboard':
-        show_dashboard()
+        lazy_import("dashboard").show_dashboard()
+
+    # Drawn last so the timings include this rerun's page
+    if debug_panel_enabled():
+        with st.sidebar:
+            if st.session_state.dataset_id is not None:
+                dataset_registry = lazy_import("dataset_registry")
+                footprint = dataset_registry.session_footprint()
+                st.caption(f"Session state {footprint['session_bytes'] / 2**20:.1f} MB · dataset "
+                           f"{footprint['dataset_bytes'] / 2**20:.1f} MB shared by {footprint['dataset_sessions']} session(s)")
+                stats = dataset_registry.registry_stats()
+                st.caption(f"Server: {stats['datasets']} dataset(s), {stats['unused_datasets']} unused, "
+                           f"{stats['sessions']} session(s) · {stats['nbytes'] / 2**20:.1f} of "
+                           f"{stats['budget_bytes'] / 2**20:.0f} MB budget")
+            show_profiling_panel()
 
 if __name__ == "__main__":
-    main()
+    try:
+        setup_page()
+        main()
+    finally:
+        record_span("main.rerun", time.perf_counter() - rerun_started, page=st.session_state.get('page'))
@@ -0,0 +1,90 @@
+import logging
+
+from utils import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Data_YTD metrics shown on the dashboard, looked up by their Parameter name.
+# A metric whose name is not in an uploaded workbook is shown as '-' with a warning.
+# "row" is the position the metric had in the original workbook layout; only
+# synthetic_workbook.py uses it, to lay out its test workbooks.
+# "format" selects how a single value is shown: value (rb/jt/miliar),
+# percentage or count.
+YTD_METRICS = {
+    "aset_investasi": {"title": "Aset Investasi", "parameter": "Aset Investasi", "row": 0, "format": "value"},
+    "deposito_berjangka": {"title": "Deposito Berjangka", "parameter": "Deposito Berjangka", "row": 1, "format": "value"},
+    "obligasi_korporasi": {"title": "Obligasi Korporasi", "parameter": "Obligasi Korporasi", "row": 2, "format": "value"},
+    "surat_berharga_negara": {
+        "title": "Surat Berharga yang Diterbitkan oleh Negara RI",
+        "parameter": "Surat Berharga yang Diterbitkan oleh Negara RI", "row": 3, "format": "value",
+    },
+    "reksa_dana": {"title": "Reksa Dana", "parameter": "Reksa Dana", "row": 4, "format": "value"},
+    "kas_dan_bank": {"title": "Kas dan Bank", "parameter": "Kas dan Bank", "row": 5, "format": "value"},
+    "jumlah_aset": {"title": "Jumlah Aset", "parameter": "Jumlah Aset", "row": 9, "format": "value"},
+    "jumlah_utang": {"title": "Jumlah Utang", "parameter": "Jumlah Utang", "row": 14, "format": "value"},
+    "jumlah_ekuitas": {"title": "Jumlah Ekuitas", "parameter": "Jumlah Ekuitas", "row": 15, "format": "value"},
+    "premi_bruto": {"title": "Premi Bruto (All)", "parameter": "Premi Bruto", "row": 16, "format": "value"},
+    "jumlah_pendapatan": {"title": "Jumlah Pendapatan", "parameter": "Jumlah Pendapatan", "row": 25, "format": "value"},
+    "klaim_bruto": {"title": "Klaim Bruto (All)", "parameter": "Klaim Bruto", "row": 26, "format": "value"},
+    "laba_rugi_komprehensif": {
+        "title": "Total Laba (Rugi) Komprehensif",
+        "parameter": "Total Laba (Rugi) Komprehensif", "row": 43, "format": "value",
+    },
+    "rbc": {"title": "RBC", "parameter": "RBC", "row": 51, "format": "percentage",
+            "subtitle": "Minimal 120% dari OJK"},
+    "jumlah_polis": {"title": "Jumlah Polis", "parameter": "Jumlah Polis", "row": 116, "format": "value"},
+    "jumlah_fraud": {"title": "Jumlah Fraud", "parameter": "Jumlah Fraud", "row": 117, "format": "count"},
+    "jumlah_gugatan": {"title": "Jumlah Gugatan", "parameter": "Jumlah Gugatan", "row": 132, "format": "count"},
+    "nominal_gugatan": {
+        "title": "Jumlah Nominal Gugatan Yang Sedang Diajukan",
+        "parameter": "Jumlah Nominal Gugatan Yang Sedang Diajukan", "row": 133, "format": "count",
+    },
+    "jumlah_pelanggaran": {
+        "title": "Jumlah Pelanggaran Atas Ketentuan",
+        "parameter": "Jumlah Pelanggaran Atas Ketentuan", "row": 134, "format": "count",
+    },
+    "jumlah_denda": {"title": "Jumlah Denda", "parameter": "Jumlah Denda", "row": 137, "format": "count"},
+    "jumlah_pengaduan": {"title": "Jumlah Pengaduan", "parameter": "Jumlah Pengaduan", "row": 139, "format": "count"},
+    "tindak_lanjut_pengaduan": {
+        "title": "Indak Lanjut Pengaduan", "parameter": "Tindak Lanjut Pengaduan", "row": 141, "format": "count",
+    },
+    "pemberitaan_negatif": {
+        "title": "Jumlah Pemberitaan Negatif Dalam 1 Tahun",
+        "parameter": "Jumlah Pemberitaan Negatif Dalam 1 Tahun", "row": 143, "format": "count",
+    },
+}
+
+# Summary rows, looked up by their Jenis Risiko name
+SUMMARY_METRICS = {
+    "composite_score": {"title": "Composite Score", "parameter": "Komposit", "row": 10},
+}
+
+# Dashboard sections, in display order
+KPI_CARDS = ["jumlah_aset", "jumlah_utang", "jumlah_ekuitas", "jumlah_polis", "kas_dan_bank", "aset_investasi", "rbc"]
+LINE_CHARTS = ["jumlah_pendapatan", "premi_bruto", "klaim_bruto", "laba_rugi_komprehensif"]
+PIE_CHARTS = ["deposito_berjangka", "obligasi_korporasi", "surat_berharga_negara", "reksa_dana"]
+COMPLIANCE_COLUMNS = [
+    ["jumlah_pengaduan", "tindak_lanjut_pengaduan", "pemberitaan_negatif"],
+    ["jumlah_fraud", "jumlah_gugatan", "nominal_gugatan"],
+    ["jumlah_pelanggaran", "jumlah_denda"],
+]
+
+
+def resolve_metric_rows(registry, parameter_rows):
+    """Map each metric key to its row offset by parameter name, or to None when the workbook lacks it"""
+    rows = {}
+    for key, metric in registry.items():
+        row = parameter_rows.get(normalize_name(metric["parameter"]))
+        if row is None:
+            logger.warning("Parameter %r not found in the workbook; %s is shown as '-'", metric["parameter"], key)
+        rows[key] = row
+    return rows
+
+
+def unresolved_metrics(data_index):
+    """Return the parameter names of the metrics a dataset's workbook lacks"""
+    return [
+        registry[key]["parameter"]
+        for registry, rows in ((YTD_METRICS, data_index["metric_rows"]), (SUMMARY_METRICS, data_index["summary_metric_rows"]))
+        for key, row in rows.items() if row is None
+    ]
@@ -1,147 +1,534 @@
+import re
 import pandas as pd
 import numpy as np
+from comparisons import compare_periods
+from metrics import SUMMARY_METRICS, YTD_METRICS, resolve_metric_rows
+from utils import normalize_name
 
-def process_excel_data(uploaded_file):
-    """Process Excel file and return cleaned dataframes"""
+# Stages passed to the optional progress callback of process_excel_data / process_excel_update
+PROGRESS_STAGES = (
+    "Workbook opened",
+    "Data_YTD sheet read",
+    "Data_YTD headers normalized",
+    "Summary sheet read",
+    "Summary headers normalized",
+    "Latest month columns detected",
+)
+
+
+# Cell values that mean "no value" in otherwise numeric columns
+MISSING_TOKENS = ('-', '')
+
+# Upper bounds of the Low, Low to Moderate, Moderate, Moderate to High and High
+# risk bands of a Summary score; scores above the last bound have no band
+RISK_BAND_THRESHOLDS = np.array([1.79, 2.59, 3.39, 4.19, 5])
+NO_RISK_BAND = -1
+
+# Month names in column labels: Data_YTD uses 'Apr-2025', Summary 'Score-April-2025'
+MONTH_NUMBERS = {}
+for _number, _name in enumerate(['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                                 'August', 'September', 'October', 'November', 'December'], start=1):
+    MONTH_NUMBERS[_name.casefold()] = _number
+    MONTH_NUMBERS[_name[:3].casefold()] = _number
+MONTH_NUMBERS['sept'] = 9
+MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _report(progress, stage):
+    """Pass a processing stage to the optional progress callback"""
+    if progress is not None:
+        progress(stage)
+
+
+def _fill_unnamed_columns(columns):
+    """Replace 'Unnamed: N' headers with the closest named header to their left"""
+    labels = pd.Series(list(columns), dtype=object)
+    unnamed = labels.map(str).str.startswith('Unnamed: ').to_numpy()
+    named = labels.where(~unnamed & (labels != 'Parameter').to_numpy())
+    last_named = named.ffill().to_numpy()
+    # Leading unnamed headers (nothing named to their left) keep their own label
+    has_left = pd.notna(last_named) & last_named.astype(bool)
+    return list(np.where(unnamed & has_left, last_named, labels.to_numpy()))
+
+
+def _ytd_column_labels(columns, row_0):
+    """Build the '<row 0 value>-<header>' labels of the Data_YTD sheet"""
+    labels = np.array(_fill_unnamed_columns(columns), dtype=object)
+    row_0 = pd.Series(row_0, dtype=object).ffill()
+    prefix = row_0.map(str).where(row_0.notna(), '').to_numpy(dtype=object)
+    combined = prefix + '-' + pd.Series(labels, dtype=object).map(str).to_numpy(dtype=object)
+    return list(np.where(labels == 'Parameter', 'Parameter', combined))
+
+
+def _summary_column_labels(row_0, row_1):
+    """Build the Summary labels from the month row and the score label row"""
+    row_0 = pd.Series(row_0, dtype=object).ffill()
+    row_0_str = row_0.map(str).where(row_0.notna(), '').to_numpy(dtype=object)
+
+    # Blank cells right of a score label become '<left>-weighted' and
+    # '<left>-score classification', alternating over all blank cells
+    row_1 = np.array(row_1, dtype=object)
+    blank = pd.isna(row_1)
+    blank[:2] = False
+    suffix = np.where(np.cumsum(blank) % 2 == 1, '-weighted', '-score classification').astype(object)
+    pending = blank.copy()
+    while pending.any():
+        ready = np.flatnonzero(pending & ~np.roll(pending, 1))
+        row_1[ready] = pd.Series(row_1[ready - 1], dtype=object).map(str).to_numpy(dtype=object) + suffix[ready]
+        pending[ready] = False
+
+    row_1 = pd.Series(row_1, dtype=object)
+    row_1_str = row_1.map(str).where(row_1.notna(), '')
+    parts = row_1_str.str.split('-')
+    n_parts = parts.str.len().to_numpy()
+    part_0, part_1, part_2 = (parts.str[k].fillna('').to_numpy(dtype=object) for k in range(3))
+    row_1_str = row_1_str.to_numpy(dtype=object)
+    weighted = pd.Series(row_1_str).str.lower().str.contains('weighted', regex=False).to_numpy()
+
+    labels = np.select(
+        [weighted & (n_parts >= 3), weighted & (n_parts == 2)],
+        [
+            part_0 + '-' + row_0_str + '-' + part_1 + '-' + part_2,
+            part_0 + '-' + row_0_str + '-' + part_1,
+        ],
+        default=row_1_str + '-' + row_0_str,
+    )
+    labels[:2] = row_0_str[:2]
+    return list(labels)
+
+
+def _normalize_ytd_sheet(df_ytd):
+    """Flatten the Data_YTD headers and find the latest filled month column"""
+    latest_col_ytd_idx = None
+
+    if 'Unnamed: 0' in df_ytd.columns:
+        df_ytd = df_ytd.drop('Unnamed: 0', axis=1)
+    if 'Unnamed: 1' in df_ytd.columns:
+        df_ytd = df_ytd.rename(columns={'Unnamed: 1': 'Parameter'})
+
+    if len(df_ytd) == 0:
+        df_ytd.columns = _fill_unnamed_columns(df_ytd.columns)
+    else:
+        df_ytd.columns = _ytd_column_labels(df_ytd.columns, df_ytd.iloc[0].to_numpy())
+        df_ytd = df_ytd.iloc[1:].reset_index(drop=True)
+        # The first month without a value in the first parameter row marks the end of the data
+        row_0_ytd_numpy = df_ytd.iloc[0].to_numpy()
+        nan_indices = int(np.where(pd.isna(row_0_ytd_numpy))[0][0])
+        latest_col_ytd_idx = df_ytd.columns[nan_indices-1]
+
+    return df_ytd, latest_col_ytd_idx
+
+
+def _normalize_summary_sheet(df_summary):
+    """Flatten the Summary headers and drop the two label rows"""
+    # Drop the leading index column; the sheet header row itself carries no labels
+    df_summary = df_summary.iloc[:, 1:]
+
+    if len(df_summary) > 1:
+        header = df_summary.iloc[:2].to_numpy()
+        df_summary = df_summary.iloc[2:].reset_index(drop=True)
+        df_summary.columns = _summary_column_labels(header[0], header[1])
+    else:
+        df_summary.columns = ['Parameter'] + [f'Col_{i}' for i in range(2, len(df_summary.columns) + 1)]
+
+    return df_summary
+
+
+def _latest_summary_col_idx(df_summary):
+    """Return the position of the latest filled Summary month column, or None"""
+    if len(df_summary) > 0:
+        date_columns = [col for col in df_summary.columns if col not in ['Parameter', 'nan-nan']]
+
+        if len(date_columns) >= 2:
+            # The first '-' in the first risk row marks the first month without data
+            row_0_numpy = df_summary.iloc[0].to_numpy()
+            nan_mask = row_0_numpy == '-'
+            if nan_mask.any():
+                return int(np.where(nan_mask)[0][0]) - 3
+    return None
+
+
+def _summary_present(df_summary, latest_col_idx):
+    """Build the previous/present month view of the latest Summary month"""
+    if latest_col_idx is None:
+        return None
+    previous_col_idx = latest_col_idx - 3
+    if previous_col_idx < 0 or latest_col_idx < 0:
+        return None
+
+    latest_col = df_summary.columns[latest_col_idx]
+    previous_col = df_summary.columns[previous_col_idx]
+
+    # Check if 'Jenis Risiko' column exists
+    if 'Jenis Risiko' in df_summary.columns:
+        df_summary_present = df_summary[['Jenis Risiko', previous_col, latest_col]].copy()
+    else:
+        # Use first column as risk category
+        df_summary_present = df_summary.iloc[:, [0, previous_col_idx, latest_col_idx]].copy()
+    df_summary_present.columns = ['Kategori Risiko', 'previous_month', 'present_month']
+    return df_summary_present
+
+
+def _coerce_numeric(df, label_count):
+    """Convert value columns holding only numbers and missing markers to float
+
+    The first `label_count` columns and columns with real text (such as score
+    classifications) are kept as they are. Missing markers become NaN, and all
+    float columns end up in one contiguous block.
+    """
+    # The whole value block is converted in one pass, cell by cell in flat order
+    cells = df.iloc[:, label_count:].to_numpy(dtype=object)
+    converted = pd.to_numeric(pd.Series(cells.ravel()), errors='coerce').to_numpy(dtype=np.float64)
+    converted = converted.reshape(cells.shape)
+
+    # Cells that did not convert must be missing markers; a column with any other text stays as it is
+    rejected_rows, rejected_columns = np.nonzero(np.isnan(converted) & ~pd.isna(cells))
+    rejected = pd.Series(cells[rejected_rows, rejected_columns], dtype=object)
+    is_marker = rejected.map(str).str.strip().isin(MISSING_TOKENS).to_numpy()
+    text_columns = set((rejected_columns[~is_marker] + label_count).tolist())
+
+    columns = {}
+    for i in range(df.shape[1]):
+        if i < label_count or i in text_columns:
+            columns[i] = df.iloc[:, i].to_numpy()
+        else:
+            columns[i] = converted[:, i - label_count]
+
+    # Building the frame from the column arrays consolidates same-dtype columns
+    typed = pd.DataFrame(columns, index=df.index)
+    typed.columns = df.columns
+    return typed
+
+
+def ytd_month_matrix(df_ytd):
+    """Return the Data_YTD month labels and a (parameters x months) float matrix
+
+    When every month column is float the matrix is a read-only view of the frame's
+    float block, so a parameter's series or a window of months is a slice, not a copy.
+    """
+    start = 1 if len(df_ytd.columns) and df_ytd.columns[0] == 'Parameter' else 0
+    months = df_ytd.iloc[:, start:]
+    if all(pd.api.types.is_float_dtype(dtype) for dtype in months.dtypes):
+        matrix = months.to_numpy()
+    else:
+        # Months that kept text cells are read as NaN there
+        matrix = months.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    matrix.setflags(write=False)
+    return months.columns, matrix
+
+
+def build_parameter_index(labels):
+    """Map normalized parameter names to the offset of their first row"""
+    index = {}
+    for row, label in enumerate(labels):
+        if pd.notna(label):
+            index.setdefault(normalize_name(label), row)
+    return index
+
+
+def risk_band_codes(df):
+    """Return the risk band of every cell of a frame as an int8 array
+
+    Codes index RISK_BAND_THRESHOLDS (0 = Low ... 4 = High); cells that are not
+    numbers or score above the last threshold get NO_RISK_BAND.
+    """
+    is_value = np.array([pd.api.types.is_float_dtype(dtype) for dtype in df.dtypes], dtype=bool)
+    scores = np.full(df.shape, np.nan)
+    scores[:, is_value] = df.loc[:, is_value].to_numpy(dtype=float)
+    # Label and text columns may still hold a few numbers among their text
+    for i in np.flatnonzero(~is_value):
+        scores[:, i] = pd.to_numeric(df.iloc[:, i], errors='coerce').to_numpy(dtype=float)
+    # NaN sorts after every threshold, so missing scores land past the last band too
+    codes = np.searchsorted(RISK_BAND_THRESHOLDS, scores, side='left').astype(np.int8)
+    codes[codes == len(RISK_BAND_THRESHOLDS)] = NO_RISK_BAND
+    return codes
+
+
+def parse_period(label):
+    """Return the (year, month) a column label refers to, or None"""
+    year = month = None
+    for token in re.split(r'[^0-9A-Za-z]+', str(label)):
+        if month is None and token.casefold() in MONTH_NUMBERS:
+            month = MONTH_NUMBERS[token.casefold()]
+        elif year is None and len(token) == 4 and token.isdigit():
+            year = int(token)
+    if year is None or month is None:
+        return None
+    return year, month
+
+
+def summary_month_starts(summary_columns):
+    """Map each (year, month) of the Summary sheet to the position of its score column
+
+    A Summary month spans three adjacent columns; its score column is the first
+    of the last group labelled with that month.
+    """
+    group_starts = {}
+    last_period = None
+    for position, label in enumerate(summary_columns):
+        period = parse_period(label)
+        if period is not None and period != last_period:
+            group_starts[period] = position
+        last_period = period
+    return group_starts
+
+
+def period_label(period):
+    """Return the Data_YTD style label ('Apr-2025') of a (year, month)"""
+    year, month = period
+    return f"{MONTH_LABELS[month - 1]}-{year}"
+
+
+def summary_score_matrix(df_summary):
+    """Return the Summary months, their score column positions and the (risks x months) float score matrix"""
+    periods = sorted(summary_month_starts(df_summary.columns).items())
+    positions = [position for _, position in periods]
+    scores = df_summary.iloc[:, positions].apply(pd.to_numeric, errors='coerce')
+    return [period for period, _ in periods], positions, scores.to_numpy(dtype=float).reshape(len(df_summary), len(positions))
+
+
+def summary_detail_matrices(df_summary, positions):
+    """Return the (risks x months) weighted score and score classification matrices of the score columns
+
+    The weighted score and classification of a month follow its score column;
+    months cut short at the right edge of the sheet get NaN and None.
+    """
+    weighted = np.full((len(df_summary), len(positions)), np.nan)
+    classes = np.full((len(df_summary), len(positions)), None, dtype=object)
+    for month, position in enumerate(positions):
+        if position + 1 < len(df_summary.columns):
+            weighted[:, month] = pd.to_numeric(df_summary.iloc[:, position + 1], errors='coerce').to_numpy(dtype=float)
+        if position + 2 < len(df_summary.columns):
+            column = df_summary.iloc[:, position + 2].to_numpy(dtype=object)
+            column[pd.isna(column) | (column == '-')] = None
+            classes[:, month] = column
+    return weighted, classes
+
+
+def risk_category_rows(names):
+    """Map each risk category name to its first Summary row, in sheet order"""
+    rows = {}
+    for row, name in enumerate(names):
+        if pd.notna(name):
+            rows.setdefault(str(name), row)
+    return rows
+
+
+def build_period_map(ytd_columns, summary_columns):
+    """Map each Data_YTD date column to its Summary (present, previous) column positions
+
+    The present column is the score column of the date's Summary month, and the
+    previous column the score column of the month before it. Dates without a
+    Summary month are left out.
+    """
+    group_starts = summary_month_starts(summary_columns)
+    periods = sorted(group_starts)
+    previous = {period: group_starts[periods[i - 1]] if i > 0 else None for i, period in enumerate(periods)}
+
+    period_map = {}
+    for label in ytd_columns:
+        period = parse_period(label)
+        if period in group_starts:
+            period_map[label] = (group_starts[period], previous[period])
+    return period_map
+
+
+def _freeze_arrays(data_index):
+    """Make the arrays of a data index read-only, since every session viewing the dataset shares them"""
+    for value in data_index.values():
+        for array in (value.values() if isinstance(value, dict) else [value]):
+            if isinstance(array, np.ndarray):
+                array.setflags(write=False)
+    return data_index
+
+
+def build_data_index(df_ytd, df_summary):
+    """Build the name-based row lookups used by the dashboard for a processed dataset"""
+    ytd_rows = {}
+    if df_ytd is not None and 'Parameter' in df_ytd.columns:
+        ytd_rows = build_parameter_index(df_ytd['Parameter'])
+
+    summary_rows = {}
+    risk_categories = {}
+    if df_summary is not None and 'Jenis Risiko' in df_summary.columns:
+        summary_rows = build_parameter_index(df_summary['Jenis Risiko'])
+        risk_categories = risk_category_rows(df_summary['Jenis Risiko'])
+
+    ytd_months, ytd_matrix = ytd_month_matrix(df_ytd) if df_ytd is not None else (pd.Index([]), np.empty((0, 0)))
+    summary_periods, summary_score_columns, summary_scores = (
+        summary_score_matrix(df_summary) if df_summary is not None else ([], [], np.empty((0, 0)))
+    )
+    summary_weighted, summary_classes = (
+        summary_detail_matrices(df_summary, summary_score_columns) if df_summary is not None
+        else (np.empty((0, 0)), np.empty((0, 0), dtype=object))
+    )
+
+    return _freeze_arrays({
+        'ytd_rows': ytd_rows,
+        'ytd_months': ytd_months,
+        'ytd_month_positions': {label: position for position, label in enumerate(ytd_months)},
+        'ytd_matrix': ytd_matrix,
+        'summary_rows': summary_rows,
+        'metric_rows': resolve_metric_rows(YTD_METRICS, ytd_rows),
+        'summary_metric_rows': resolve_metric_rows(SUMMARY_METRICS, summary_rows),
+        # Risk bands of the whole Summary history, aligned with df_summary's columns
+        'summary_bands': risk_band_codes(df_summary) if df_summary is not None else None,
+        'summary_columns_by_date': build_period_map(
+            df_ytd.columns if df_ytd is not None else [],
+            df_summary.columns if df_summary is not None else [],
+        ),
+        # MoM / YoY changes and rolling means of every parameter and risk score,
+        # with months as consecutive columns of the matrices
+        'ytd_comparisons': compare_periods(ytd_matrix),
+        'summary_score_positions': {position: month for month, position in enumerate(summary_score_columns)},
+        'summary_comparisons': compare_periods(summary_scores),
+        # Drill-down by risk category: its Summary row, and per month (in the order of
+        # summary_score_positions) its score, weighted score and score classification
+        'risk_categories': risk_categories,
+        'summary_months': [period_label(period) for period in summary_periods],
+        'summary_scores': summary_scores,
+        'summary_weighted': summary_weighted,
+        'summary_classes': summary_classes,
+    })
+
+
+def process_excel_data(uploaded_file, progress=None):
+    """Process Excel file and return cleaned dataframes
+
+    Numeric value columns are returned as float64 with NaN for missing cells,
+    including '-' and blank markers.
+    """
     try:
-        excel_file = pd.ExcelFile(uploaded_file)
-
-        # Process Data_YTD sheet
-        df_ytd = None
-        latest_col_ytd_idx = None
-        if "Data_YTD" in excel_file.sheet_names:
-            df_ytd = pd.read_excel(uploaded_file, sheet_name="Data_YTD")
-
-            if 'Unnamed: 0' in df_ytd.columns:
-                df_ytd = df_ytd.drop('Unnamed: 0', axis=1)
-            if 'Unnamed: 1' in df_ytd.columns:
-                df_ytd = df_ytd.rename(columns={'Unnamed: 1': 'Parameter'})
-
-            cols = list(df_ytd.columns)
-            new_cols = []
-            last_named = None
-
-            for col in cols:
-                col_str = str(col)
-                if col_str.startswith('Unnamed: '):
-                    new_cols.append(last_named if last_named else col)
-                else:
-                    new_cols.append(col)
-                    if col != 'Parameter':
-                        last_named = col
-
-            df_ytd.columns = new_cols
-
-            if len(df_ytd) > 0:
-                df_ytd.iloc[0] = df_ytd.iloc[0].ffill()
-
-            if len(df_ytd) > 0:
-                new_columns = []
-                for i, col in enumerate(df_ytd.columns):
-                    if col == 'Parameter':
-                        new_columns.append('Parameter')
-                    else:
-                        row_0_value = str(df_ytd.iloc[0, i]) if pd.notna(df_ytd.iloc[0, i]) else ''
-                        new_columns.append(f"{row_0_value}-{col}")
-
-                df_ytd.columns = new_columns
-                df_ytd = df_ytd.iloc[1:].reset_index(drop=True)
-
-                df_ytd_numpy = df_ytd.to_numpy()
-                row_0_ytd_numpy = df_ytd_numpy[0]
-                nan_indices = int(np.where(pd.isna(row_0_ytd_numpy))[0][0])
-                latest_col_ytd_idx = df_ytd.columns[nan_indices-1]
-                present_col_ytd = df_ytd.columns[max(0, nan_indices - 13):nan_indices]
-
-        # Process Summary sheet
-        df_summary = None
-        df_summary_present = None
-        latest_col_idx = None
-
-        if "Summary" in excel_file.sheet_names:
-            df_summary = pd.read_excel(uploaded_file, sheet_name="Summary")
-
-            original_columns = df_summary.columns.tolist()
-            df_summary.loc[-1] = original_columns
-            df_summary.index = df_summary.index + 1
-            df_summary = df_summary.sort_index()
-
-            df_summary.columns = [f'Col_{i}' for i in range(len(df_summary.columns))]
-            df_summary = df_summary.drop('Col_0', axis=1)
-            df_summary = df_summary.rename(columns={'Col_1': 'Parameter'})
-            df_summary = df_summary.iloc[1:].reset_index(drop=True)
-
-            if len(df_summary) > 0:
-                df_summary.iloc[0] = df_summary.iloc[0].ffill()
-
-            if len(df_summary) > 1:
-                first_nan = True
-                for i in range(2, len(df_summary.columns)):
-                    col = df_summary.columns[i]
-                    if col != 'Parameter' and pd.isna(df_summary.iloc[1, i]):
-                        left_col = df_summary.columns[i-1]
-                        left_value = str(df_summary.iloc[1, df_summary.columns.get_loc(left_col)])
-
-                        if first_nan:
-                            df_summary.iloc[1, i] = f"{left_value}-weighted"
-                            first_nan = False
-                        else:
-                            df_summary.iloc[1, i] = f"{left_value}-score classification"
-                            first_nan = True
-
-            if len(df_summary) > 1:
-                new_columns = []
-                for i, col in enumerate(df_summary.columns):
-                    row_0_value = str(df_summary.iloc[0, i]) if pd.notna(df_summary.iloc[0, i]) else ''
-                    row_1_value = str(df_summary.iloc[1, i]) if pd.notna(df_summary.iloc[1, i]) else ''
-
-                    if i < 2:
-                        new_columns.append(f"{row_0_value}")
-                    else:
-                        if 'weighted' in row_1_value.lower() or 'weighted-classification' in row_1_value.lower():
-                            row_1_parts = row_1_value.split('-')
-                            if len(row_1_parts) >= 3:
-                                try:
-                                    result = f"{row_1_parts[0]}-{row_0_value}-{row_1_parts[1]}-{row_1_parts[2]}"
-                                except:
-                                    result = f"{row_0_value}-{row_1_parts[1]}"
-                                new_columns.append(result)
-                            elif len(row_1_parts) >= 2:
-                                new_columns.append(f"{row_1_parts[0]}-{row_0_value}-{row_1_parts[1]}")
-                            else:
-                                new_columns.append(f"{row_1_value}-{row_0_value}")
-                        else:
-                            new_columns.append(f"{row_1_value}-{row_0_value}")
-
-                df_summary.columns = new_columns
-                df_summary = df_summary.iloc[2:].reset_index(drop=True)
-
-            if len(df_summary) > 0:
-                date_columns = [col for col in df_summary.columns if col not in ['Parameter', 'nan-nan']]
-
-                if len(date_columns) >= 2:
-                    df_numpy = df_summary.to_numpy()
-                    row_0_numpy = df_numpy[0]
-                    nan_mask = row_0_numpy == '-'
-                    if nan_mask.any():
-                        nan_indices = int(np.where(nan_mask)[0][0])
-                        latest_col_idx = nan_indices - 3
-                        previous_col_idx = nan_indices - 6
-
-                        if previous_col_idx >= 0 and latest_col_idx >= 0:
-                            latest_col = df_summary.columns[latest_col_idx]
-                            previous_col = df_summary.columns[previous_col_idx]
-
-                            # Check if 'Jenis Risiko' column exists
-                            if 'Jenis Risiko' in df_summary.columns:
-                                df_summary_present = df_summary[['Jenis Risiko', previous_col, latest_col]].copy()
-                                df_summary_present.columns = ['Kategori Risiko', 'previous_month', 'present_month']
-                            else:
-                                # Use first column as risk category
-                                df_summary_present = df_summary.iloc[:, [0, previous_col_idx, latest_col_idx]].copy()
-                                df_summary_present.columns = ['Kategori Risiko', 'previous_month', 'present_month']
+        # Open the workbook once (read-only) and read each sheet from that handle in turn,
+        # so every stage is reported when it is actually reached
+        with pd.ExcelFile(uploaded_file) as excel_file:
+            _report(progress, PROGRESS_STAGES[0])
+
+            # Process Data_YTD sheet
+            df_ytd = None
+            latest_col_ytd_idx = None
+            raw_ytd = excel_file.parse("Data_YTD") if "Data_YTD" in excel_file.sheet_names else None
+            _report(progress, PROGRESS_STAGES[1])
+            if raw_ytd is not None:
+                df_ytd, latest_col_ytd_idx = _normalize_ytd_sheet(raw_ytd)
+                df_ytd = _coerce_numeric(df_ytd, 1)
+                del raw_ytd
+            _report(progress, PROGRESS_STAGES[2])
+
+            # Process Summary sheet
+            df_summary = None
+            df_summary_present = None
+            latest_col_idx = None
+            raw_summary = excel_file.parse("Summary") if "Summary" in excel_file.sheet_names else None
+            _report(progress, PROGRESS_STAGES[3])
+            if raw_summary is not None:
+                df_summary = _normalize_summary_sheet(raw_summary)
+                del raw_summary
+            _report(progress, PROGRESS_STAGES[4])
+            if df_summary is not None:
+                # The '-' end marker has to be located before it is coerced to NaN
+                latest_col_idx = _latest_summary_col_idx(df_summary)
+                df_summary = _coerce_numeric(df_summary, 2)
+                df_summary_present = _summary_present(df_summary, latest_col_idx)
+            _report(progress, PROGRESS_STAGES[5])
 
         return df_ytd, df_summary, df_summary_present, latest_col_idx, latest_col_ytd_idx, True, "Data processed successfully!"
 
     except Exception as e:
         return None, None, None, None, None, False, f"Error processing file: {str(e)}"
+
+
+def _read_new_ytd_months(excel_file, df_ytd, latest_col_ytd_idx):
+    """Return df_ytd extended with the workbook's columns after the stored latest month, or None if the layout changed"""
+    # Only the header rows and the first parameter row are needed to locate the months
+    raw_header = excel_file.parse("Data_YTD", nrows=2)
+    offset = 1 if 'Unnamed: 0' in raw_header.columns else 0
+    header, new_latest = _normalize_ytd_sheet(raw_header)
+
+    labels = list(header.columns)
+    base_labels = list(df_ytd.columns)
+    if latest_col_ytd_idx not in base_labels or new_latest not in labels:
+        return None
+    keep = base_labels.index(latest_col_ytd_idx) + 1
+    if labels[:keep] != base_labels[:keep] or labels.index(new_latest) + 1 < keep:
+        return None
+
+    usecols = [offset] + [pos + offset for pos in range(keep, len(labels))]
+    part = excel_file.parse("Data_YTD", usecols=usecols).iloc[1:].reset_index(drop=True)
+    # Rows must line up with the stored parameters, otherwise a full parse is needed
+    if not part.iloc[:, 0].equals(df_ytd.iloc[:, 0]):
+        return None
+
+    part = part.iloc[:, 1:]
+    part.columns = labels[keep:]
+    part = _coerce_numeric(part, 0)
+    df_ytd = pd.concat([df_ytd.iloc[:, :keep], part], axis=1)
+    return df_ytd, new_latest, labels.index(new_latest) + 1 - keep
+
+
+def _read_new_summary_months(excel_file, df_summary, latest_col_idx):
+    """Return df_summary extended with the month blocks after the stored latest month, or None if the layout changed"""
+    header = _normalize_summary_sheet(excel_file.parse("Summary", nrows=3))
+    new_latest_col_idx = _latest_summary_col_idx(header)
+
+    labels = list(header.columns)
+    base_labels = list(df_summary.columns)
+    keep = latest_col_idx + 3
+    if new_latest_col_idx is None or new_latest_col_idx < latest_col_idx or keep < 2:
+        return None
+    if labels[:keep] != base_labels[:keep]:
+        return None
+
+    # Summary frame positions are one to the right in the sheet (the index column is dropped)
+    usecols = [1, 2] + [pos + 1 for pos in range(keep, len(labels))]
+    part = excel_file.parse("Summary", usecols=usecols).iloc[2:].reset_index(drop=True)
+    for i in range(2):
+        if not part.iloc[:, i].equals(df_summary.iloc[:, i]):
+            return None
+
+    part = part.iloc[:, 2:]
+    part.columns = labels[keep:]
+    part = _coerce_numeric(part, 0)
+    df_summary = pd.concat([df_summary.iloc[:, :keep], part], axis=1)
+    return df_summary, new_latest_col_idx, (new_latest_col_idx - latest_col_idx) // 3
+
+
+def process_excel_update(uploaded_file, df_ytd, df_summary, latest_col_idx, latest_col_ytd_idx, progress=None):
+    """Append only the months that are new in a workbook to already processed data"""
+    try:
+        ytd_update = summary_update = None
+        if df_ytd is not None and df_summary is not None and latest_col_idx is not None and latest_col_ytd_idx:
+            with pd.ExcelFile(uploaded_file) as excel_file:
+                _report(progress, PROGRESS_STAGES[0])
+                if {"Data_YTD", "Summary"} <= set(excel_file.sheet_names):
+                    # Only the new month columns are read, so reading and normalizing a sheet is one step
+                    ytd_update = _read_new_ytd_months(excel_file, df_ytd, latest_col_ytd_idx)
+                    _report(progress, PROGRESS_STAGES[1])
+                    _report(progress, PROGRESS_STAGES[2])
+                    if ytd_update is not None:
+                        summary_update = _read_new_summary_months(excel_file, df_summary, latest_col_idx)
+                        _report(progress, PROGRESS_STAGES[3])
+                        _report(progress, PROGRESS_STAGES[4])
+
+        if ytd_update is None or summary_update is None:
+            # The stored data does not match this workbook's layout, so process it in full
+            if hasattr(uploaded_file, 'seek'):
+                uploaded_file.seek(0)
+            result = process_excel_data(uploaded_file, progress)
+            if result[5]:
+                result = result[:6] + (f"{result[6]} (full workbook processed: layout differs from the stored data)",)
+            return result
+
+        df_ytd, latest_col_ytd_idx, new_ytd_months = ytd_update
+        df_summary, latest_col_idx, new_summary_months = summary_update
+        df_summary_present = _summary_present(df_summary, latest_col_idx)
+        _report(progress, PROGRESS_STAGES[5])
+
+        if new_ytd_months == 0 and new_summary_months == 0:
+            message = "No new months found; the stored data is up to date"
+        else:
+            message = f"Appended {new_ytd_months} Data_YTD and {new_summary_months} Summary month(s) to the stored data"
+        return df_ytd, df_summary, df_summary_present, latest_col_idx, latest_col_ytd_idx, True, message
+
+    except Exception as e:
+        return None, None, None, None, None, False, f"Error processing file: {str(e)}"
@@ -0,0 +1,144 @@
+"""Timing spans around the stages of a rerun.
+
+Every span adds its duration to a per-stage window of recent samples kept for the
+whole server process, which the debug sidebar panel summarises as p50/p95. Spans
+are also logged as one JSON object per line on the "profiling" logger when INFO
+is enabled for it; setting RISK_PROFILE_LOG=<path> writes them to that file.
+
+    with span("dashboard.summary_table"):
+        ...
+
+Page modules are imported through lazy_import on their first visit, which records
+the import as stage "import.<module>". The module has no pandas/NumPy dependency
+so the home menu renders without loading them.
+"""
+import functools
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Samples kept per stage for the percentiles
+PROFILE_WINDOW = 200
+
+# The debug panel shows server-wide timings and memory and can reset them, so only the
+# operator can turn it on, with RISK_DEBUG=1; viewers cannot enable it from the URL
+DEBUG_PANEL = os.environ.get("RISK_DEBUG") == "1"
+
+logger = logging.getLogger("profiling")
+PROFILE_LOG = os.environ.get("RISK_PROFILE_LOG")
+if PROFILE_LOG:
+    _handler = logging.FileHandler(PROFILE_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# stage -> recent durations in seconds
+_samples = defaultdict(lambda: deque(maxlen=PROFILE_WINDOW))
+_samples_lock = threading.Lock()
+
+
+def record_span(name, seconds, **fields):
+    """Record the duration of one stage"""
+    with _samples_lock:
+        _samples[name].append(seconds)
+
+    if logger.isEnabledFor(logging.INFO):
+        ctx = get_script_run_ctx(suppress_warning=True)
+        record = {
+            "ts": round(time.time(), 3),
+            "span": name,
+            "ms": round(seconds * 1000, 3),
+            "session": ctx.session_id if ctx is not None else None,
+            **fields,
+        }
+        logger.info(json.dumps(record, default=str))
+
+
+@contextmanager
+def span(name, **fields):
+    """Time the enclosed block as stage `name`; extra fields go into its log record"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started, **fields)
+
+
+def timed(name):
+    """Decorator timing every call of a function as stage `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def lazy_import(module_name):
+    """Import a module on first use, timing the first import as stage import.<module_name>"""
+    # import_module, unlike a sys.modules lookup, waits for an import another session
+    # has started, so no session gets a partially initialized module
+    first = module_name not in sys.modules
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if first:
+        record_span(f"import.{module_name}", time.perf_counter() - started)
+    return module
+
+
+def _percentile(ordered, q):
+    """Return the q-th percentile of sorted values, interpolating linearly like numpy.percentile"""
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def stage_stats():
+    """Return the sample count, p50, p95 and last duration in milliseconds of every stage"""
+    with _samples_lock:
+        samples = {name: list(durations) for name, durations in _samples.items()}
+
+    rows = []
+    for name, durations in sorted(samples.items()):
+        ordered = sorted(durations)
+        p50, p95 = _percentile(ordered, 50) * 1000, _percentile(ordered, 95) * 1000
+        rows.append({"stage": name, "count": len(durations), "p50_ms": round(p50, 2),
+                     "p95_ms": round(p95, 2), "last_ms": round(durations[-1] * 1000, 2)})
+    return rows
+
+
+def clear_stats():
+    """Forget every recorded sample"""
+    with _samples_lock:
+        _samples.clear()
+
+
+def debug_panel_enabled():
+    """Return whether the server was started with the profiling panel enabled"""
+    return DEBUG_PANEL
+
+
+def show_profiling_panel():
+    """Display the per-stage p50/p95 of recent reruns in the sidebar"""
+    with st.expander("⏱️ Profiling", expanded=False):
+        stats = stage_stats()
+        if not stats:
+            st.caption("No timings recorded yet")
+            return
+        st.dataframe(stats, hide_index=True, use_container_width=True)
+        st.caption(f"Over the last {PROFILE_WINDOW} samples per stage, all sessions")
+        if st.button("Reset timings", use_container_width=True):
+            clear_stats()
+            st.rerun()
@@ -1,41 +1,117 @@
+import time
+
 import streamlit as st
-from preprocess_data import process_excel_data
+from data_cache import file_fingerprint, get_cached_result, update_fingerprint
+from dataset_registry import session_dataset, set_session_dataset
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from ingest_jobs import collect_job, get_job, job_done, job_progress, submit_ingest
+from profiling import span, timed
+
+
+@st.fragment(run_every=0.5)
+def show_ingest_progress(file_hash):
+    """Poll a background ingest job and rerun the page once it has finished"""
+    job = get_job(file_hash)
+    if job is None or job_done(job):
+        st.rerun()
+
+    stages, fraction = job_progress(job)
+    st.progress(fraction, text=stages[-1] if stages else "Opening workbook...")
+    st.caption(f"Processing for {time.time() - job['started_at']:.0f}s")
+
+def release_upload(uploaded_file):
+    """Free the bytes of a parsed upload and give the next upload a fresh, empty uploader"""
+    ctx = get_script_run_ctx()
+    if ctx is not None and ctx.uploaded_file_mgr is not None:
+        ctx.uploaded_file_mgr.remove_file(ctx.session_id, uploaded_file.file_id)
+    st.session_state.upload_key = st.session_state.get('upload_key', 0) + 1
+
+def show_upload_preview(dataset, message):
+    """Display the outcome and a preview of the last parsed upload"""
+    st.success(f"✅ {message}")
+
+    # Display preview
+    if dataset.df_ytd is not None:
+        st.header("📈 Data_YTD Preview")
+        st.dataframe(dataset.df_ytd.head(10), use_container_width=True)
+
+    if dataset.df_summary_present is not None:
+        st.header("📊 Summary Preview")
+        st.dataframe(dataset.df_summary_present, use_container_width=True)
 
+    st.divider()
+    if st.button("✅ Confirm and View Dashboard", use_container_width=True):
+        st.session_state.pop('upload_message', None)
+        st.session_state.page = 'dashboard'
+        st.rerun()
+
+@timed("upload.page")
 def show_data_upload():
     """Display data upload interface"""
     st.title("📊 Excel File Upload and Display")
 
-    uploaded_file = st.file_uploader("Choose an Excel file", type=['xlsx', 'xls'])
+    uploaded_file = st.file_uploader(
+        "Choose an Excel file", type=['xlsx', 'xls'], key=f"upload_{st.session_state.get('upload_key', 0)}"
+    )
+
+    # Monthly updates can append only the new month columns to the data already loaded
+    base = None
+    dataset = session_dataset()
+    if dataset is not None and dataset.df_ytd is not None and dataset.df_summary is not None:
+        if st.checkbox("Only append new months to the loaded data", key="incremental_upload"):
+            base = (dataset.df_ytd, dataset.df_summary, dataset.latest_col_idx, dataset.latest_col_ytd_idx)
 
     if uploaded_file is not None:
-        df_ytd, df_summary, df_summary_present, latest_col_idx, latest_col_ytd_idx, success, message = process_excel_data(uploaded_file)
+        st.session_state.pop('upload_error', None)
+
+        # Reruns and re-uploads of the same workbook are served from the parse cache.
+        # A full parse is keyed by the workbook hash; an incremental one also by the
+        # dataset it extends, so each only ever finds results of its own kind.
+        with span("upload.fingerprint"):
+            file_bytes = uploaded_file.getvalue()
+            file_hash = file_fingerprint(file_bytes)
+            if base is not None:
+                file_hash = update_fingerprint(dataset.dataset_id, file_hash)
+            # A finished job keeps its result until collected, even if the cache skipped it
+            job = get_job(file_hash)
+            result = get_cached_result(file_hash) if job is None else None
+
+        # Otherwise the workbook is parsed in a worker process while this page polls its progress
+        from_job = result is None
+        if from_job:
+            job = job or submit_ingest(file_bytes, file_hash, base)
+            if not job_done(job):
+                show_ingest_progress(file_hash)
+                return
+            result = collect_job(job)
+
+        success, message = result[5], result[6]
 
         if success:
-            st.success(f"✅ {message}")
-
-            # Store in session state
-            st.session_state.df_ytd = df_ytd
-            st.session_state.df_summary = df_summary
-            st.session_state.df_summary_present = df_summary_present
-            st.session_state.latest_col_idx = latest_col_idx
-            st.session_state.latest_col_ytd_idx = latest_col_ytd_idx
-            st.session_state.uploaded_file = uploaded_file
-
-            # Display preview
-            if df_ytd is not None:
-                st.header("📈 Data_YTD Preview")
-                st.dataframe(df_ytd.head(10), use_container_width=True)
-
-            if df_summary_present is not None:
-                st.header("📊 Summary Preview")
-                st.dataframe(df_summary_present, use_container_width=True)
-
-            st.divider()
-            if st.button("✅ Confirm and View Dashboard", use_container_width=True):
+            with span("upload.register"):
+                # Sessions uploading the same workbook (onto the same base) share one registered copy of its data
+                set_session_dataset(file_hash, result)
+
+                # The parsed frames are all the session needs; the workbook bytes are dropped
+                release_upload(uploaded_file)
+
+            # A background parse that just finished goes straight to the dashboard
+            if from_job:
                 st.session_state.page = 'dashboard'
-                st.rerun()
+            else:
+                st.session_state.upload_message = message
+            st.rerun()
         else:
-            st.error(f"❌ {message}")
+            # The failed job has been collected; clearing the uploader keeps reruns from
+            # resubmitting it, and uploading the file again retries the parse
+            st.session_state.upload_error = message
+            st.session_state.pop('upload_message', None)
+            release_upload(uploaded_file)
+            st.rerun()
+    elif st.session_state.get('upload_message') and dataset is not None:
+        show_upload_preview(dataset, st.session_state.upload_message)
     else:
+        if st.session_state.get('upload_error'):
+            st.error(f"❌ {st.session_state.upload_error}")
         st.info("👆 Please upload an Excel file to get started")
         st.write("**Note:** The file should contain sheets named 'Data_YTD' and 'Summary'")
@@ -0,0 +1,61 @@
+"""Listing and metadata of the saved snapshots, readable without pandas or pyarrow"""
+import json
+import os
+import shutil
+
+# Directory holding one sub-directory per saved snapshot
+SNAPSHOT_DIR = os.environ.get(
+    "RISK_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"),
+)
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_KEEP = 12
+
+
+def snapshot_path(snapshot_id, snapshot_dir=None):
+    """Return the directory of a snapshot"""
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, snapshot_id)
+
+
+def list_snapshots(snapshot_dir=None):
+    """Return the ids of all complete snapshots, oldest first"""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    if not os.path.isdir(snapshot_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(snapshot_dir)
+        if not name.startswith(".") and os.path.isfile(os.path.join(snapshot_dir, name, "meta.json"))
+    )
+
+
+def read_snapshot_meta(snapshot_id, snapshot_dir=None):
+    """Return the metadata of a snapshot"""
+    with open(os.path.join(snapshot_path(snapshot_id, snapshot_dir), "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def latest_snapshot_meta(snapshot_dir=None):
+    """Return the metadata of the newest readable snapshot, or None"""
+    for snapshot_id in reversed(list_snapshots(snapshot_dir)):
+        try:
+            meta = read_snapshot_meta(snapshot_id, snapshot_dir)
+        except (OSError, ValueError):
+            continue
+        if meta.get("format_version") == SNAPSHOT_FORMAT_VERSION:
+            return meta
+    return None
+
+
+def find_snapshot(source_hash, snapshot_dir=None):
+    """Return the id of the newest snapshot of a source file hash, or None"""
+    for snapshot_id in reversed(list_snapshots(snapshot_dir)):
+        if snapshot_id.endswith(f"-{source_hash[:12]}"):
+            return snapshot_id
+    return None
+
+
+def prune_snapshots(keep=SNAPSHOT_KEEP, snapshot_dir=None):
+    """Delete all but the newest `keep` snapshots"""
+    snapshot_ids = list_snapshots(snapshot_dir)
+    for snapshot_id in snapshot_ids[:max(0, len(snapshot_ids) - keep)]:
+        shutil.rmtree(snapshot_path(snapshot_id, snapshot_dir), ignore_errors=True)
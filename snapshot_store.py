@@ -0,0 +1,183 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from snapshot_catalog import (
+    SNAPSHOT_DIR, SNAPSHOT_FORMAT_VERSION, SNAPSHOT_KEEP, latest_snapshot_meta, prune_snapshots,
+    read_snapshot_meta, snapshot_path,
+)
+
+FRAME_NAMES = ("df_ytd", "df_summary", "df_summary_present")
+
+# Cell kinds used to round-trip object columns that mix numbers and text ('-', '')
+KIND_NULL, KIND_FLOAT, KIND_INT, KIND_TEXT, KIND_BOOL = 0, 1, 2, 3, 4
+
+
+def _encode_object_column(values):
+    """Split an object column into kind / float / int / text arrays"""
+    n = len(values)
+    kinds = np.zeros(n, dtype=np.int8)
+    floats = np.full(n, np.nan)
+    ints = np.zeros(n, dtype=np.int64)
+    texts = [None] * n
+
+    for i, value in enumerate(values):
+        if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+            continue
+        if isinstance(value, (bool, np.bool_)):
+            kinds[i] = KIND_BOOL
+            ints[i] = int(value)
+        elif isinstance(value, (int, np.integer)) and -2**63 <= int(value) < 2**63:
+            kinds[i] = KIND_INT
+            ints[i] = int(value)
+        elif isinstance(value, (int, float, np.integer, np.floating)):
+            kinds[i] = KIND_FLOAT
+            floats[i] = float(value)
+        else:
+            # Dates and any other objects are kept as their text form
+            kinds[i] = KIND_TEXT
+            texts[i] = str(value)
+
+    return kinds, floats, ints, texts
+
+
+def _decode_object_column(kinds, floats, ints, texts):
+    """Rebuild an object column from the arrays written by _encode_object_column"""
+    values = np.full(len(kinds), np.nan, dtype=object)
+    for i, kind in enumerate(kinds):
+        if kind == KIND_FLOAT:
+            values[i] = float(floats[i])
+        elif kind == KIND_INT:
+            values[i] = int(ints[i])
+        elif kind == KIND_TEXT:
+            values[i] = texts[i]
+        elif kind == KIND_BOOL:
+            values[i] = bool(ints[i])
+    return values
+
+
+def _frame_to_table(df):
+    """Convert a dataframe to an Arrow table with positional field names"""
+    arrays = []
+    names = []
+    encodings = []
+    for i in range(df.shape[1]):
+        column = df.iloc[:, i]
+        if column.dtype == object:
+            kinds, floats, ints, texts = _encode_object_column(column.to_numpy())
+            arrays += [pa.array(kinds), pa.array(floats), pa.array(ints), pa.array(texts, type=pa.string())]
+            names += [f"{i}.kind", f"{i}.float", f"{i}.int", f"{i}.text"]
+            encodings.append("object")
+        else:
+            arrays.append(pa.array(column, from_pandas=True))
+            names.append(str(i))
+            encodings.append("plain")
+
+    metadata = {
+        "columns": json.dumps([c if isinstance(c, (str, int, float)) else str(c) for c in df.columns]),
+        "encodings": json.dumps(encodings),
+    }
+    return pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+
+
+def _table_to_frame(table):
+    """Convert an Arrow table written by _frame_to_table back to a dataframe"""
+    metadata = table.schema.metadata
+    labels = json.loads(metadata[b"columns"])
+    encodings = json.loads(metadata[b"encodings"])
+
+    data = {}
+    for i, encoding in enumerate(encodings):
+        if encoding == "object":
+            data[i] = _decode_object_column(
+                table.column(f"{i}.kind").to_numpy(),
+                table.column(f"{i}.float").to_numpy(),
+                table.column(f"{i}.int").to_numpy(),
+                table.column(f"{i}.text").to_pylist(),
+            )
+        else:
+            data[i] = table.column(str(i)).to_pandas()
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(table.num_rows))
+    df.columns = labels
+    return df
+
+
+def save_snapshot(result, source_hash, snapshot_dir=None, keep=SNAPSHOT_KEEP):
+    """Write a processed result as a new versioned Arrow snapshot and return its id
+
+    Older snapshots beyond the newest `keep` are deleted; pass keep=None to keep all.
+    """
+    df_ytd, df_summary, df_summary_present, latest_col_idx, latest_col_ytd_idx = result[:5]
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+
+    latest = latest_snapshot_meta(snapshot_dir)
+    if latest is not None and latest.get("source_hash") == source_hash:
+        return latest["snapshot_id"]
+
+    snapshot_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{source_hash[:12]}"
+    final_path = snapshot_path(snapshot_id, snapshot_dir)
+    # Every writer gets its own temp dir; list_snapshots skips the leading dot
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix=f".{snapshot_id}.", suffix=".tmp", dir=snapshot_dir)
+
+    try:
+        frames = []
+        for name, df in zip(FRAME_NAMES, (df_ytd, df_summary, df_summary_present)):
+            if df is None:
+                continue
+            table = _frame_to_table(df)
+            with pa.OSFile(os.path.join(tmp_path, f"{name}.arrow"), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            frames.append(name)
+
+        meta = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "snapshot_id": snapshot_id,
+            "source_hash": source_hash,
+            "created_at": time.time(),
+            "frames": frames,
+            "latest_col_idx": latest_col_idx,
+            "latest_col_ytd_idx": latest_col_ytd_idx,
+        }
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        try:
+            os.replace(tmp_path, final_path)
+        except OSError:
+            # Another writer published the same content within the same second
+            if not os.path.isfile(os.path.join(final_path, "meta.json")):
+                raise
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    if keep is not None:
+        prune_snapshots(keep, snapshot_dir)
+    return snapshot_id
+
+
+def load_snapshot(snapshot_id, snapshot_dir=None):
+    """Load a snapshot in the same shape as process_excel_data's result"""
+    meta = read_snapshot_meta(snapshot_id, snapshot_dir)
+    frames = dict.fromkeys(FRAME_NAMES)
+    for name in meta["frames"]:
+        # Read into memory: object columns are decoded cell by cell and the frame is
+        # built from new arrays, so a memory-mapped file would be copied anyway
+        with pa.OSFile(os.path.join(snapshot_path(snapshot_id, snapshot_dir), f"{name}.arrow"), "rb") as source:
+            frames[name] = _table_to_frame(pa.ipc.open_file(source).read_all())
+
+    return (
+        frames["df_ytd"], frames["df_summary"], frames["df_summary_present"],
+        meta["latest_col_idx"], meta["latest_col_ytd_idx"],
+        True, f"Loaded saved snapshot {snapshot_id}",
+    )
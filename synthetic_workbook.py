@@ -0,0 +1,122 @@
+"""Generate synthetic risk workbooks with the Data_YTD and Summary layouts.
+
+Example:
+    python synthetic_workbook.py sample.xlsx --months 120 --parameters 1000
+"""
+import argparse
+import random
+import sys
+
+import openpyxl
+
+from metrics import SUMMARY_METRICS, YTD_METRICS
+
+MONTH_ABBREVIATIONS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+RISK_TYPES = ["Risiko Strategis", "Risiko Operasional", "Risiko Asuransi", "Risiko Kredit", "Risiko Pasar",
+              "Risiko Likuiditas", "Risiko Hukum", "Risiko Kepatuhan", "Risiko Reputasi"]
+RISK_CLASSES = ["Low", "Low to Moderate", "Moderate", "Moderate to High", "High"]
+START_YEAR = 2020
+
+
+def _parameter_names(parameters):
+    """Name the rows after the dashboard metrics where they fit, 'Parameter N' elsewhere"""
+    names = [f"Parameter {row + 1}" for row in range(parameters)]
+    for metric in YTD_METRICS.values():
+        if metric["row"] < parameters:
+            names[metric["row"]] = metric["parameter"]
+    return names
+
+
+def _risk_names(rows):
+    """Name the Summary rows: risk types, then the composite score row"""
+    names = RISK_TYPES + [f"Risiko Lainnya {row + 1}" for row in range(max(0, rows - len(RISK_TYPES)))]
+    names = names[:rows]
+    composite = SUMMARY_METRICS["composite_score"]
+    if composite["row"] < rows:
+        names[composite["row"]] = composite["parameter"]
+    return names
+
+
+def _ytd_value(rnd, missing_rate):
+    """Return one Data_YTD cell: a float, an integer or a missing marker"""
+    draw = rnd.random()
+    if draw < missing_rate:
+        return "-" if draw < missing_rate * 0.7 else ""
+    if draw < 0.5:
+        return rnd.randint(0, 10**10)
+    return round(rnd.random() * 1e9, 2)
+
+
+def write_workbook(path, months=24, parameters=150, filled_months=None, summary_rows=12,
+                   missing_rate=0.05, seed=0):
+    """Write a synthetic workbook and return its path
+
+    `filled_months` months carry data (all but the last two by default); the rest
+    are left empty so the first-row end markers are detected as in real workbooks.
+    """
+    if filled_months is None:
+        filled_months = max(1, months - 2)
+    filled_months = min(filled_months, months)
+    rnd = random.Random(seed)
+
+    # Write-only mode streams rows to disk, which keeps large workbooks cheap to build
+    workbook = openpyxl.Workbook(write_only=True)
+
+    # Data_YTD: the header row holds the year on the first month of each year, the first
+    # row below it the month abbreviation; data rows start with an index and a name
+    sheet = workbook.create_sheet("Data_YTD")
+    sheet.append([None, None] + [START_YEAR + m // 12 if m % 12 == 0 else None for m in range(months)])
+    sheet.append([None, None] + [MONTH_ABBREVIATIONS[m % 12] for m in range(months)])
+    for row, name in enumerate(_parameter_names(parameters)):
+        if row == 0:
+            # The first parameter row is always filled up to the latest month
+            values = [round(rnd.random() * 1e12, 2) for _ in range(filled_months)]
+        else:
+            values = [_ytd_value(rnd, missing_rate) for _ in range(filled_months)]
+        sheet.append([row + 1, name] + values + [None] * (months - filled_months))
+
+    # Summary: a title row, a month row with one label per three columns, a row with
+    # one score label per month (weighted / score classification are left blank),
+    # then one row per risk with '-' in the first row after the latest month
+    sheet = workbook.create_sheet("Summary")
+    sheet.append(["Profil Risiko"] + [None] * (2 + 3 * months))
+    month_row = [None, "No", "Jenis Risiko"]
+    label_row = [None, None, None]
+    for m in range(months):
+        month_row += [f"{MONTH_NAMES[m % 12]}-{START_YEAR + m // 12}", None, None]
+        label_row += ["Score", None, None]
+    sheet.append(month_row)
+    sheet.append(label_row)
+    for row, name in enumerate(_risk_names(summary_rows)):
+        values = []
+        for m in range(months):
+            if m < filled_months:
+                score = round(rnd.uniform(1, 5), 2)
+                values += [score, round(score * rnd.uniform(0.05, 0.3), 3), RISK_CLASSES[min(int(score) - 1, 4)]]
+            else:
+                values += ["-" if row == 0 else None, None, None]
+        sheet.append([None, row + 1, name] + values)
+
+    workbook.save(path)
+    return path
+
+
+def main(argv=None):
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Write a synthetic Data_YTD/Summary workbook.")
+    parser.add_argument("path", help="output .xlsx path")
+    parser.add_argument("--months", type=int, default=24, help="month columns (default: 24)")
+    parser.add_argument("--parameters", type=int, default=150, help="Data_YTD parameter rows (default: 150)")
+    parser.add_argument("--filled-months", type=int, help="months with data (default: all but the last two)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    write_workbook(args.path, args.months, args.parameters, args.filled_months, seed=args.seed)
+    print(f"Wrote {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""The array-based header builders must produce exactly the labels of the original per-cell loops"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocess_data import _summary_column_labels, _ytd_column_labels
+
+
+def loop_ytd_labels(columns, row_0):
+    """Data_YTD labels as built by the original loops"""
+    filled = []
+    last_named = None
+    for col in columns:
+        if str(col).startswith('Unnamed: '):
+            filled.append(last_named if last_named else col)
+        else:
+            filled.append(col)
+            if col != 'Parameter':
+                last_named = col
+
+    row_0 = pd.Series(row_0, dtype=object).ffill().tolist()
+    labels = []
+    for i, col in enumerate(filled):
+        if col == 'Parameter':
+            labels.append('Parameter')
+        else:
+            row_0_value = str(row_0[i]) if pd.notna(row_0[i]) else ''
+            labels.append(f"{row_0_value}-{col}")
+    return labels
+
+
+def loop_summary_labels(row_0, row_1):
+    """Summary labels as built by the original loops"""
+    row_0 = pd.Series(row_0, dtype=object).ffill().tolist()
+    row_1 = list(row_1)
+
+    first_nan = True
+    for i in range(2, len(row_1)):
+        if pd.isna(row_1[i]):
+            left_value = str(row_1[i - 1])
+            if first_nan:
+                row_1[i] = f"{left_value}-weighted"
+                first_nan = False
+            else:
+                row_1[i] = f"{left_value}-score classification"
+                first_nan = True
+
+    labels = []
+    for i in range(len(row_0)):
+        row_0_value = str(row_0[i]) if pd.notna(row_0[i]) else ''
+        row_1_value = str(row_1[i]) if pd.notna(row_1[i]) else ''
+        if i < 2:
+            labels.append(f"{row_0_value}")
+        elif 'weighted' in row_1_value.lower():
+            row_1_parts = row_1_value.split('-')
+            if len(row_1_parts) >= 3:
+                labels.append(f"{row_1_parts[0]}-{row_0_value}-{row_1_parts[1]}-{row_1_parts[2]}")
+            elif len(row_1_parts) >= 2:
+                labels.append(f"{row_1_parts[0]}-{row_0_value}-{row_1_parts[1]}")
+            else:
+                labels.append(f"{row_1_value}-{row_0_value}")
+        else:
+            labels.append(f"{row_1_value}-{row_0_value}")
+    return labels
+
+
+YTD_CASES = {
+    "leading unnamed headers": (
+        ['Unnamed: 2', 'Unnamed: 3', 2023, 'Unnamed: 5', 'Unnamed: 6', 2024, 'Unnamed: 8'],
+        ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul'],
+    ),
+    "unnamed right after Parameter": (
+        ['Parameter', 'Unnamed: 2', 2023, 'Unnamed: 4', 2024],
+        ['Nama', 'Jan', 'Feb', 'Mar', 'Apr'],
+    ),
+    "runs of blank cells": (
+        ['Parameter', 2023, 'Unnamed: 3', 'Unnamed: 4', 'Unnamed: 5', 2024, 'Unnamed: 7'],
+        [np.nan, 'Jan', np.nan, np.nan, 'Apr', np.nan, np.nan],
+    ),
+    "blank first row": (
+        ['Parameter', '2023', 'Unnamed: 3'],
+        [np.nan, np.nan, np.nan],
+    ),
+    "numbers and dates in the first row": (
+        ['Parameter', 2023, 'Unnamed: 3', 'Unnamed: 4'],
+        ['No', 1, 2.5, pd.Timestamp('2023-03-31')],
+    ),
+}
+
+SUMMARY_CASES = {
+    "one part labels": (
+        ['No', 'Jenis Risiko', 'Jan-2023', np.nan, np.nan, 'Feb-2023', np.nan, np.nan],
+        [np.nan, np.nan, 'Score', np.nan, np.nan, 'Score', np.nan, np.nan],
+    ),
+    "two part labels": (
+        ['No', 'Jenis Risiko', 'Jan', np.nan, np.nan],
+        ['No', 'Risk', 'Score-weighted', 'Score-Weighted', 'Final-score'],
+    ),
+    "three or more parts": (
+        ['No', 'Jenis Risiko', 'Jan', 'Feb', 'Mar', 'Apr'],
+        ['x', 'y', 'a-b-weighted', 'a-b-c-weighted-e', 'weighted-classification-x', 'a-b-c'],
+    ),
+    "runs of blank cells": (
+        ['No', 'Jenis Risiko', 'Jan', np.nan, np.nan, np.nan, np.nan, np.nan, 'Feb', np.nan],
+        [np.nan, np.nan, 'Score', np.nan, np.nan, np.nan, np.nan, np.nan, 'Score-x', np.nan],
+    ),
+    "blank month row": (
+        [np.nan, np.nan, np.nan, np.nan, np.nan],
+        [np.nan, np.nan, 'Score', np.nan, 'Score'],
+    ),
+    "blank label row after the label columns": (
+        ['No', 'Jenis Risiko', 'Jan', 'Feb'],
+        [np.nan, np.nan, np.nan, np.nan],
+    ),
+}
+
+
+@pytest.mark.parametrize("columns, row_0", YTD_CASES.values(), ids=YTD_CASES.keys())
+def test_ytd_labels_match_loops(columns, row_0):
+    assert _ytd_column_labels(columns, np.array(row_0, dtype=object)) == loop_ytd_labels(columns, row_0)
+
+
+@pytest.mark.parametrize("row_0, row_1", SUMMARY_CASES.values(), ids=SUMMARY_CASES.keys())
+def test_summary_labels_match_loops(row_0, row_1):
+    row_0, row_1 = np.array(row_0, dtype=object), np.array(row_1, dtype=object)
+    assert _summary_column_labels(row_0, row_1) == loop_summary_labels(row_0, row_1)
+
+
+def test_random_headers_match_loops():
+    rng = random.Random(0)
+    cells = [np.nan, np.nan, np.nan, 'Jan', 'Score', 'Score-x', 'a-b-weighted', 'weighted', 2023, 1.5, '-', '']
+    for _ in range(300):
+        width = rng.randint(1, 20)
+        row_0 = [rng.choice(cells) for _ in range(width)]
+        row_1 = [rng.choice(cells) for _ in range(width)]
+        columns = [rng.choice(['Parameter', 2023, 'Jan', f'Unnamed: {i}', f'Unnamed: {i}']) for i in range(width)]
+
+        assert _ytd_column_labels(columns, np.array(row_0, dtype=object)) == loop_ytd_labels(columns, row_0)
+        assert _summary_column_labels(np.array(row_0, dtype=object), np.array(row_1, dtype=object)) == \
+            loop_summary_labels(row_0, row_1)
@@ -2,6 +2,8 @@ import pandas as pd
 
 def format_value(value):
     """Format value to show in thousand, million or billion"""
+    if is_missing(value):
+        return "-"
     try:
         val = float(value)
         if val >= 1_000_000_000:  # Billion
@@ -17,13 +19,35 @@ def format_value(value):
 
 def format_percentage(value):
     """Convert value to percentage format for RBC"""
+    if is_missing(value):
+        return "-"
     try:
         return f"{float(value*100):.2f}%"
     except:
         return f"{value*100}%"
 
+def is_missing(value):
+    """Return True for NaN and the '-' / blank markers used in the workbooks"""
+    return pd.isna(value) or (isinstance(value, str) and value.strip() in ("-", ""))
+
 def null_value(value):
     """Return 0 if value is NaN or '-', otherwise return the value"""
-    if pd.isna(value) or value == "-" or value == "":
+    if is_missing(value):
         return 0
     return value
+
+def format_number(value):
+    """Show whole numbers without a trailing '.0' (counts are stored as floats)"""
+    if isinstance(value, float) and value.is_integer():
+        return f"{int(value)}"
+    return f"{value}"
+
+def format_average(value):
+    """Show an average of counts with one decimal, or '-' when there is none"""
+    if is_missing(value):
+        return "-"
+    return f"{float(value):,.1f}"
+
+def normalize_name(name):
+    """Normalize a parameter name for lookups (case and whitespace insensitive)"""
+    return " ".join(str(name).split()).casefold()